@@ -0,0 +1,111 @@
+"""
+An in-memory cache for the weather lookups of one process, so a popular
+destination is looked up once rather than by every request asking for it
+"""
+from collections import OrderedDict
+from functools import partial
+import asyncio
+import os
+import time
+
+WEATHER_CACHE_SIZE = int(os.environ.get("WEATHER_CACHE_SIZE", 4096))
+WEATHER_CACHE_TTL = float(os.environ.get("WEATHER_CACHE_TTL", 6 * 60 * 60))
+
+
+class TTLCache:
+    """
+    Keeps at most 'maxsize' values, evicting the least recently used one
+    when full, and forgets each value 'ttl' seconds after it was stored.
+
+    Concurrent misses for the same key are coalesced: the first one
+    starts the load, the others wait for its result instead of starting
+    their own. A failed load is not cached, every waiter receives its
+    error.
+    """
+
+    def __init__(self, maxsize=WEATHER_CACHE_SIZE, ttl=WEATHER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """
+        Returns: the value cached for the key, or None when there is none
+        or it has expired
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            self.expirations += 1
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self.entries[key] = (value, time.monotonic() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(self, key, load):
+        """
+        Arguments:
+        - key: a hashable key
+        - load: an async function without arguments returning the value
+        to cache for the key
+
+        Returns: the cached value, or the value 'load' returned
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        task = self.in_flight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(load())
+            self.in_flight[key] = task
+            task.add_done_callback(partial(self.finish_load, key))
+        else:
+            self.coalesced += 1
+        # a waiter that is cancelled must not cancel the load the others
+        # are waiting for
+        return await asyncio.shield(task)
+
+    def finish_load(self, key, task):
+        del self.in_flight[key]
+        if not task.cancelled() and task.exception() is None:
+            self.set(key, task.result())
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+weather_cache = TTLCache()
+
+
+def get_weather_cache():
+    """
+    The cache the endpoints use. Tests override this dependency with a
+    cache of their own
+    """
+    return weather_cache
@@ -0,0 +1,264 @@
+"""
+A persistent store of the temperature of every (city, country, month)
+the weather API has been asked for. Those answers come from one fixed
+sample year, so they never change and only have to be fetched once.
+
+Pre-populate it for a list of destinations, one "city,country" per line:
+>>> python climatology.py destinations.csv
+
+Monthly normals computed over several years of daily data, see
+normals.py, are kept in the same file, as are the years of daily data
+fetched for them.
+"""
+import argparse
+import asyncio
+import csv
+import datetime
+import numpy as np
+import os
+import sqlite3
+import threading
+
+CLIMATOLOGY_DB = os.environ.get("CLIMATOLOGY_DB", "climatology.sqlite3")
+
+# the columns of a normals array, which has one row per month
+NORMALS_COLUMNS = ("mean", "min", "max", "p10", "p50", "p90")
+
+
+def normalize(value):
+    """
+    Returns: the value lowercased with runs of whitespace collapsed, so
+    ' New  York' and 'new york' are stored once
+    """
+    return " ".join(value.split()).casefold()
+
+
+class ClimatologyStore:
+    """
+    Monthly temperatures in an SQLite file, keyed by the normalized city
+    and country and the month number. Counts the hits and misses of
+    'get' since the store was opened.
+
+    The monthly normals of a city and country are stored as one 12 x 6
+    float32 array, 288 bytes, with the columns of NORMALS_COLUMNS. The
+    daily temperatures of a year are stored as one float32 array with a
+    value, or NaN, for each day from January 1st
+    """
+
+    def __init__(self, path=CLIMATOLOGY_DB):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS monthly_temperature (
+                    city TEXT NOT NULL,
+                    country TEXT NOT NULL,
+                    month INTEGER NOT NULL,
+                    temperature REAL NOT NULL,
+                    fetched_at TEXT NOT NULL,
+                    PRIMARY KEY (city, country, month)
+                ) WITHOUT ROWID
+                """
+            )
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS monthly_normals (
+                    city TEXT NOT NULL,
+                    country TEXT NOT NULL,
+                    first_year INTEGER NOT NULL,
+                    last_year INTEGER NOT NULL,
+                    normals BLOB NOT NULL,
+                    PRIMARY KEY (city, country)
+                ) WITHOUT ROWID
+                """
+            )
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS daily_temperature (
+                    city TEXT NOT NULL,
+                    country TEXT NOT NULL,
+                    year INTEGER NOT NULL,
+                    temperatures BLOB NOT NULL,
+                    PRIMARY KEY (city, country, year)
+                ) WITHOUT ROWID
+                """
+            )
+
+    def get(self, city, country, month):
+        """
+        Returns: the temperature of the month, or None when it has not
+        been stored yet
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT temperature FROM monthly_temperature "
+                "WHERE city = ? AND country = ? AND month = ?",
+                (normalize(city), normalize(country), month),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, city, country, month, temperature):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO monthly_temperature VALUES (?, ?, ?, ?, ?)",
+                (
+                    normalize(city),
+                    normalize(country),
+                    month,
+                    temperature,
+                    datetime.datetime.utcnow().isoformat(),
+                ),
+            )
+
+    def get_normals(self, city, country):
+        """
+        Returns: the normals array of the city and country, or None when
+        none have been computed
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT normals FROM monthly_normals WHERE city = ? AND country = ?",
+                (normalize(city), normalize(country)),
+            ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32).reshape(12, len(NORMALS_COLUMNS))
+
+    def put_normals(self, city, country, first_year, last_year, normals):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO monthly_normals VALUES (?, ?, ?, ?, ?)",
+                (
+                    normalize(city),
+                    normalize(country),
+                    first_year,
+                    last_year,
+                    np.ascontiguousarray(normals, dtype=np.float32).tobytes(),
+                ),
+            )
+
+    def get_daily_years(self, city, country, first_year, last_year):
+        """
+        Returns: a dictionary of the daily temperature arrays of the
+        stored years between first_year and last_year, by year
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT year, temperatures FROM daily_temperature "
+                "WHERE city = ? AND country = ? AND year BETWEEN ? AND ?",
+                (normalize(city), normalize(country), first_year, last_year),
+            ).fetchall()
+        return {year: np.frombuffer(blob, dtype=np.float32) for year, blob in rows}
+
+    def put_daily_year(self, city, country, year, temperatures):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO daily_temperature VALUES (?, ?, ?, ?)",
+                (
+                    normalize(city),
+                    normalize(country),
+                    year,
+                    np.ascontiguousarray(temperatures, dtype=np.float32).tobytes(),
+                ),
+            )
+
+    def stats(self):
+        with self.lock:
+            (rows,) = self.connection.execute(
+                "SELECT COUNT(*) FROM monthly_temperature"
+            ).fetchone()
+            (normals,) = self.connection.execute(
+                "SELECT COUNT(*) FROM monthly_normals"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "months": rows,
+            "normals": normals,
+        }
+
+    def close(self):
+        self.connection.close()
+
+
+store = None
+
+
+def get_climatology_store():
+    """
+    The store the endpoints use, opened on first use. Tests override this
+    dependency with a store of their own
+    """
+    global store
+    if store is None:
+        store = ClimatologyStore()
+    return store
+
+
+async def populate(store, destinations):
+    """
+    Fetches and stores every month that is missing for each destination,
+    at most WEATHER_CONCURRENCY requests at a time. Each month is stored
+    as soon as it arrives, so when some requests fail the months already
+    fetched are kept and not requested again
+
+    Returns: the number of months that were fetched
+
+    Raises the first error of the requests that failed, once every other
+    request has finished
+    """
+    import main as weather
+
+    query = weather.WeatherQueries()
+
+    async def fetch_month(city, country, month):
+        date = f"2021-{month:02}-01"
+        data = await query.get_weather(weather.weather_path(city, country, date))
+        await asyncio.to_thread(
+            store.put, city, country, month, data["days"][0]["temp"]
+        )
+
+    await weather.open_http_client()
+    try:
+        missing = [
+            (city, country, month)
+            for city, country in destinations
+            for month in range(1, 13)
+            if store.get(city, country, month) is None
+        ]
+        results = await asyncio.gather(
+            *[fetch_month(city, country, month) for city, country, month in missing],
+            return_exceptions=True,
+        )
+    finally:
+        await weather.close_http_client()
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        raise errors[0]
+    return len(missing)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-populates the climatology store")
+    parser.add_argument("destinations", help='a CSV file of "city,country" rows')
+    args = parser.parse_args()
+    with open(args.destinations, newline="") as destinations_file:
+        destinations = [
+            (row[0].strip(), row[1].strip())
+            for row in csv.reader(destinations_file)
+            if len(row) >= 2
+        ]
+    fetched = asyncio.run(populate(get_climatology_store(), destinations))
+    print(f"Fetched {fetched} months for {len(destinations)} destinations")
+
+
+if __name__ == "__main__":
+    main()
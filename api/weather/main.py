@@ -1,9 +1,14 @@
-import json
 from fastapi import FastAPI, Depends
-import requests
+from functools import partial
+import asyncio
+import httpx
 import random
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from cache import get_weather_cache
+from climatology import get_climatology_store, normalize
+from normals import describe_month
+from typing import Optional
 import datetime
 import os
 
@@ -24,15 +29,109 @@ WEATHER_API_KEY = os.environ["WEATHER_API_KEY"]
 base_url = "https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/timeline/"
 rest_of_path = f"?unitGroup=us&elements=name%2Ctempmax%2Ctempmin%2Ctemp&include=days%2Ccurrent&key={WEATHER_API_KEY}&contentType=json"
 
+# how many Visual Crossing requests this process makes at once, and how
+# long one may take, in seconds
+WEATHER_CONCURRENCY = int(os.environ.get("WEATHER_CONCURRENCY", 4))
+WEATHER_TIMEOUT = float(os.environ.get("WEATHER_TIMEOUT", 10))
+
+# months warmer than WEATHER_HOT_ABOVE degrees Fahrenheit are 'hot', months
+# warmer than WEATHER_MODERATE_ABOVE 'moderate', the others 'cold'. These
+# are the condition names of the packing-lists suggestions
+WEATHER_HOT_ABOVE = float(os.environ.get("WEATHER_HOT_ABOVE", 70))
+WEATHER_MODERATE_ABOVE = float(os.environ.get("WEATHER_MODERATE_ABOVE", 55))
+
+# shared by every request, so connections to the API are kept alive
+# between them. Both are created when the app starts
+http_client = None
+upstream_slots = None
+
+
+@app.on_event("startup")
+async def open_http_client():
+    global http_client, upstream_slots
+    http_client = httpx.AsyncClient(timeout=WEATHER_TIMEOUT)
+    upstream_slots = asyncio.Semaphore(WEATHER_CONCURRENCY)
+
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await http_client.aclose()
+
+
+def weather_range_path(city, country, start, end):
+    date_section = f"{start}/{end}"
+    search_parameters = f"{city}%20{country}/{date_section}"
+    return base_url + search_parameters + rest_of_path
+
+
+def weather_path(city, country, date):
+    return weather_range_path(city, country, date, date)
+
+
+async def get_month_temperature(query, store, city, country, date):
+    """
+    Returns: the temperature of the date's month from the climatology
+    store, fetched from the weather API and stored when it is missing.
+    The store is SQLite, so it is read and written from a worker thread
+    instead of blocking the event loop
+    """
+    month = int(date[5:7])
+    temperature = await asyncio.to_thread(store.get, city, country, month)
+    if temperature is None:
+        data = await query.get_weather(weather_path(city, country, date))
+        temperature = data["days"][0]["temp"]
+        await asyncio.to_thread(store.put, city, country, month, temperature)
+    return temperature
+
+
+class NormalsOut(BaseModel):
+    mean: float
+    min: float
+    max: float
+    p10: float
+    p50: float
+    p90: float
+
 
 class TempOut(BaseModel):
     id: int
     date: str
     temperature: float
+    condition: str
+    normals: Optional[NormalsOut]
 
 
 class TempsOut(BaseModel):
     temps: list[TempOut]
+    condition: str
+    conditions: list[str]
+
+
+def classify(temperature):
+    if temperature > WEATHER_HOT_ABOVE:
+        return "hot"
+    if temperature > WEATHER_MODERATE_ABOVE:
+        return "moderate"
+    return "cold"
+
+
+def classify_trip(temps):
+    """
+    Arguments: the list of dictionaries of the temperature of each month
+
+    Returns: a dictionary with the key of 'temps' holding the months, each
+    with its 'condition', the 'condition' of the trip's mean temperature,
+    and the distinct 'conditions' of its months in the order they occur,
+    which can be passed as one comma separated list to the packing-lists
+    suggestions
+    """
+    conditions = []
+    for temp in temps:
+        temp["condition"] = classify(temp["temperature"])
+        if temp["condition"] not in conditions:
+            conditions.append(temp["condition"])
+    mean = sum(temp["temperature"] for temp in temps) / len(temps) if temps else 0
+    return {"temps": temps, "condition": classify(mean), "conditions": conditions}
 
 
 class WeatherQueries:
@@ -55,19 +154,21 @@ class WeatherQueries:
             dates.append(f"2021-{month}-01")
         return dates
 
-    def get_weather(self, full_path):
-        response = requests.get(full_path)
-        data = json.loads(response.content)
-        return data
+    async def get_weather(self, full_path):
+        async with upstream_slots:
+            response = await http_client.get(full_path)
+        return response.json()
 
 
-@app.get("/api/weather", response_model=TempsOut)
-def temp_list(
+@app.get("/api/weather", response_model=TempsOut, response_model_exclude_none=True)
+async def temp_list(
     city: str,
     country: str,
     departure_date: str,
     return_date: str,
     query=Depends(WeatherQueries),
+    store=Depends(get_climatology_store),
+    cache=Depends(get_weather_cache),
 ):
     """
     Arguments: strings representing city, country, departure_date, and
@@ -75,27 +176,62 @@ def temp_list(
 
     Returns: a dictionary with the key of 'temps' that has a list of
     dictionaries containing temperature data from each month of the
-    travel time
+    travel time, and the trip's conditions, see 'classify_trip'.
+
+    When monthly normals have been computed for the destination, see
+    normals.py, each month's temperature is its mean and 'normals' holds
+    its statistics. Otherwise each month comes from the in-memory cache,
+    then the climatology store, then the weather API, where the months
+    are fetched concurrently, at most WEATHER_CONCURRENCY at a time.
+    Concurrent requests for the same month share one lookup
     """
 
     dates = query.get_date_list(departure_date, return_date)
-    temps = []
     months = []
     for date in dates:
         month = date[5:7]
         datetime_obj = datetime.datetime.strptime(month, "%m")
         month_name = datetime_obj.strftime("%B")
         months.append(month_name)
+    normals = await asyncio.to_thread(store.get_normals, city, country)
+    if normals is not None:
+        temps = []
+        for i in range(len(dates)):
+            month_normals = describe_month(normals, int(dates[i][5:7]))
+            temps.append(
+                {
+                    "id": i,
+                    "date": months[i],
+                    "temperature": month_normals["mean"],
+                    "normals": month_normals,
+                }
+            )
+        return classify_trip(temps)
+    temperatures = await asyncio.gather(
+        *[
+            cache.get_or_load(
+                (normalize(city), normalize(country), int(date[5:7])),
+                partial(get_month_temperature, query, store, city, country, date),
+            )
+            for date in dates
+        ]
+    )
+    temps = []
     for i in range(len(dates)):
-        date = dates[i]
-        date_section = f"{date}/{date}"
-        search_parameters = f"{city}%20{country}/{date_section}"
-        full_path = base_url + search_parameters + rest_of_path
-        data = query.get_weather(full_path)
-        temps.append(
-            {"id": i, "date": months[i], "temperature": data["days"][0]["temp"]}
-        )
-    return {"temps": temps}
+        temps.append({"id": i, "date": months[i], "temperature": temperatures[i]})
+    return classify_trip(temps)
+
+
+@app.get("/api/weather/stats")
+def weather_stats(
+    store=Depends(get_climatology_store), cache=Depends(get_weather_cache)
+):
+    """
+    Returns: the statistics of the in-memory cache and the hit and miss
+    counts of the climatology store since the service started, and how
+    many months each holds
+    """
+    return {"cache": cache.stats(), "climatology": store.stats()}
 
 
 @app.get("/api/weather/fake", response_model=TempsOut)
@@ -121,4 +257,4 @@ def fake_temp_list(country: str, city: str, departure_date: str, return_date: st
                 "temperature": random_temperatures[index],
             }
         )
-    return {"temps": temps}
+    return classify_trip(temps)
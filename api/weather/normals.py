@@ -0,0 +1,221 @@
+"""
+Monthly temperature normals over several years of daily data, so the
+weather of a destination comes from many days of many years rather than
+the first day of each month of one year.
+
+Ingest a destination once, from the weather API or from a CSV of daily
+data with 'datetime' (or 'date') and 'temp' columns, as exported by
+Visual Crossing:
+>>> python normals.py fetch Berlin Germany --years 10
+>>> python normals.py import Berlin Germany berlin.csv
+
+Fetching uses one record of the weather API's daily quota per day of
+data, about 3650 for 10 years, more than the 1000 records a day of the
+free plan. Each run fetches the whole years that fit in --max-records,
+WEATHER_BACKFILL_RECORDS by default, and stores them. Run it again on
+the following days until every year is stored, the normals are computed
+then.
+"""
+import argparse
+import asyncio
+import csv
+import datetime
+import numpy as np
+import os
+from climatology import NORMALS_COLUMNS, get_climatology_store
+
+PERCENTILES = np.array([0.1, 0.5, 0.9])
+
+# how many daily records one 'fetch' run may use, below the weather API's
+# quota of 1000 a day so the service itself can still make requests
+WEATHER_BACKFILL_RECORDS = int(os.environ.get("WEATHER_BACKFILL_RECORDS", 900))
+
+
+def monthly_normals(dates, temperatures):
+    """
+    Arguments:
+    - dates: an array of datetime64[D] days
+    - temperatures: an array of the temperature of each day, NaN when it
+    is unknown
+
+    Returns: a 12 x 6 float32 array with, for every month, the mean,
+    min, max and 10th, 50th and 90th percentiles (linearly interpolated,
+    as np.percentile does) of its daily temperatures
+
+    Raises ValueError when a month has no temperatures
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    temperatures = np.asarray(temperatures, dtype=np.float64)
+    known = ~np.isnan(temperatures)
+    dates, temperatures = dates[known], temperatures[known]
+    months = dates.astype("datetime64[M]").astype(np.int64) % 12
+    counts = np.bincount(months, minlength=12)
+    if not counts.all():
+        missing = [str(month + 1) for month in np.flatnonzero(counts == 0)]
+        raise ValueError(f"no temperatures for month(s) {', '.join(missing)}")
+
+    # sorted by month, then temperature, each month's temperatures are a
+    # sorted run starting at 'starts'
+    ordered = temperatures[np.lexsort((temperatures, months))]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    positions = starts[:, None] + PERCENTILES[None, :] * (counts[:, None] - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    percentiles = ordered[lower] + (ordered[upper] - ordered[lower]) * (
+        positions - lower
+    )
+
+    normals = np.empty((12, len(NORMALS_COLUMNS)), dtype=np.float32)
+    normals[:, 0] = np.bincount(months, weights=temperatures, minlength=12) / counts
+    normals[:, 1] = ordered[starts]
+    normals[:, 2] = ordered[starts + counts - 1]
+    normals[:, 3:] = percentiles
+    return normals
+
+
+def describe_month(normals, month):
+    """
+    Returns: a dictionary of the normals of a month, 1 to 12, by column
+    name
+    """
+    return {
+        column: round(float(value), 1)
+        for column, value in zip(NORMALS_COLUMNS, normals[month - 1])
+    }
+
+
+def ingest(store, city, country, dates, temperatures):
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    normals = monthly_normals(dates, temperatures)
+    years = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+    store.put_normals(city, country, int(years.min()), int(years.max()), normals)
+    return normals
+
+
+def read_csv(path):
+    """
+    Returns: the dates and temperatures of a CSV of daily data
+    """
+    dates = []
+    temperatures = []
+    with open(path, newline="") as daily_file:
+        for row in csv.DictReader(daily_file):
+            dates.append(row.get("datetime") or row["date"])
+            temperatures.append(float(row["temp"]) if row["temp"] else np.nan)
+    return np.array(dates, dtype="datetime64[D]"), np.array(temperatures)
+
+
+def year_dates(year):
+    """
+    Returns: an array of every day of the year
+    """
+    return np.arange(f"{year}-01-01", f"{year + 1}-01-01", dtype="datetime64[D]")
+
+
+async def backfill_daily(store, city, country, first_year, last_year, max_records):
+    """
+    Fetches the daily temperatures of the years from first_year to
+    last_year that are not stored yet, one request per year, at most
+    WEATHER_CONCURRENCY at a time. Every day is one record of the weather
+    API's daily quota, so only as many whole years as fit in max_records
+    are fetched, and the next run continues with the years still
+    missing. Each year is stored as soon as it arrives
+
+    Returns: the number of years that are still missing
+
+    Raises the first error of the requests that failed, once every other
+    request has finished
+    """
+    import main as weather
+
+    stored = store.get_daily_years(city, country, first_year, last_year)
+    missing = [year for year in range(first_year, last_year + 1) if year not in stored]
+    batch = []
+    records = 0
+    for year in missing:
+        records += len(year_dates(year))
+        if records > max_records:
+            break
+        batch.append(year)
+
+    query = weather.WeatherQueries()
+
+    async def fetch_year(year):
+        data = await query.get_weather(
+            weather.weather_range_path(city, country, f"{year}-01-01", f"{year}-12-31")
+        )
+        dates = year_dates(year)
+        temperatures = np.full(len(dates), np.nan, dtype=np.float32)
+        for day in data["days"]:
+            if day.get("temp") is not None:
+                index = (np.datetime64(day["datetime"], "D") - dates[0]).astype(int)
+                temperatures[index] = day["temp"]
+        await asyncio.to_thread(store.put_daily_year, city, country, year, temperatures)
+
+    await weather.open_http_client()
+    try:
+        results = await asyncio.gather(
+            *[fetch_year(year) for year in batch], return_exceptions=True
+        )
+    finally:
+        await weather.close_http_client()
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        raise errors[0]
+    return len(missing) - len(batch)
+
+
+def stored_daily(store, city, country, first_year, last_year):
+    """
+    Returns: the dates and temperatures of the stored years from
+    first_year to last_year
+    """
+    years = store.get_daily_years(city, country, first_year, last_year)
+    dates = [year_dates(year) for year in sorted(years)]
+    temperatures = [years[year] for year in sorted(years)]
+    return np.concatenate(dates), np.concatenate(temperatures).astype(np.float64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Computes monthly normals")
+    commands = parser.add_subparsers(dest="command", required=True)
+    fetch = commands.add_parser("fetch", help="from the weather API")
+    fetch.add_argument("city")
+    fetch.add_argument("country")
+    fetch.add_argument("--years", type=int, default=10)
+    fetch.add_argument("--max-records", type=int, default=WEATHER_BACKFILL_RECORDS)
+    load = commands.add_parser("import", help="from a CSV of daily data")
+    load.add_argument("city")
+    load.add_argument("country")
+    load.add_argument("path")
+    args = parser.parse_args()
+
+    store = get_climatology_store()
+    if args.command == "fetch":
+        last_year = datetime.date.today().year - 1
+        first_year = last_year - args.years + 1
+        remaining = asyncio.run(
+            backfill_daily(
+                store, args.city, args.country, first_year, last_year, args.max_records
+            )
+        )
+        if remaining:
+            print(
+                f"{remaining} of {args.years} years are still missing, "
+                "run this again once the daily quota has reset"
+            )
+            return
+        dates, temperatures = stored_daily(
+            store, args.city, args.country, first_year, last_year
+        )
+    else:
+        dates, temperatures = read_csv(args.path)
+    normals = ingest(store, args.city, args.country, dates, temperatures)
+    print(f"{len(dates)} days, monthly normals of {args.city}, {args.country}:")
+    print("month " + " ".join(f"{column:>6}" for column in NORMALS_COLUMNS))
+    for month, row in enumerate(normals, start=1):
+        print(f"{month:>5} " + " ".join(f"{value:6.1f}" for value in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,28 @@
-from main import app, WeatherQueries
+from main import app, classify, classify_trip, WeatherQueries
+import main
+from cache import TTLCache, get_weather_cache
+from climatology import ClimatologyStore, get_climatology_store, populate
+from normals import backfill_daily, ingest, monthly_normals, stored_daily
+import asyncio
 import json
+import numpy as np
+import pytest
+import threading
 from fastapi.testclient import TestClient
 
 client = TestClient(app)
 
 
+def use_empty_store():
+    store = ClimatologyStore(":memory:")
+    cache = TTLCache(maxsize=100, ttl=60)
+    app.dependency_overrides[get_climatology_store] = lambda: store
+    app.dependency_overrides[get_weather_cache] = lambda: cache
+    return store
+
+
 class FakeWeatherQueries:
-    def get_weather(self, full_path):
+    async def get_weather(self, full_path):
         data = {
             "days": [
                 {"temp": 5},
@@ -49,11 +65,14 @@ def test_temp_list():
     """
     # ARRANGE
     app.dependency_overrides[WeatherQueries] = FakeWeatherQueries
+    use_empty_store()
     correct_info = {
         "temps": [
-            {"id": 0, "date": "January", "temperature": 5},
-            {"id": 1, "date": "February", "temperature": 5},
-        ]
+            {"id": 0, "date": "January", "temperature": 5, "condition": "cold"},
+            {"id": 1, "date": "February", "temperature": 5, "condition": "cold"},
+        ],
+        "condition": "cold",
+        "conditions": ["cold"],
     }
 
     # ACT
@@ -68,3 +87,409 @@ def test_temp_list():
 
     # CLEAN UP
     app.dependency_overrides = {}
+
+
+class SlowWeatherQueries:
+    """
+    answers each month after a delay, later months first, with the month
+    number as the temperature
+    """
+
+    in_flight = 0
+    most_in_flight = 0
+
+    async def get_weather(self, full_path):
+        month = int(full_path.split("/")[-1][5:7])
+        cls = SlowWeatherQueries
+        cls.in_flight += 1
+        cls.most_in_flight = max(cls.most_in_flight, cls.in_flight)
+        await asyncio.sleep(0.05 / month)
+        cls.in_flight -= 1
+        return {"days": [{"temp": month}]}
+
+    def get_date_list(self, departure_date, return_date):
+        return ["2021-01-01", "2021-02-01", "2021-03-01"]
+
+
+def test_temp_list_fetches_months_concurrently():
+    """
+    tests that every month is requested at once and the temperatures
+    still come back in month order
+    """
+    # ARRANGE
+    app.dependency_overrides[WeatherQueries] = SlowWeatherQueries
+    use_empty_store()
+
+    # ACT
+    response = client.get(
+        "/api/weather?country=germany&city=berlin&departure_date=2023-01-05&return_date=2023-03-12"
+    )
+
+    # ASSERT
+    assert response.status_code == 200
+    temps = json.loads(response.content)["temps"]
+    assert [temp["temperature"] for temp in temps] == [1, 2, 3]
+    assert SlowWeatherQueries.most_in_flight == 3
+
+    # CLEAN UP
+    app.dependency_overrides = {}
+
+
+class CountingWeatherQueries(FakeWeatherQueries):
+    calls = 0
+
+    async def get_weather(self, full_path):
+        CountingWeatherQueries.calls += 1
+        return await super().get_weather(full_path)
+
+
+def test_temp_list_reads_stored_months():
+    """
+    tests that months fetched once are answered from the climatology
+    store, whatever the case and spacing of the city and country
+    """
+    # ARRANGE
+    app.dependency_overrides[WeatherQueries] = CountingWeatherQueries
+    store = use_empty_store()
+    client.get(
+        "/api/weather?country=germany&city=berlin&departure_date=2023-01-05&return_date=2023-02-12"
+    )
+    # as after a restart, with nothing in memory
+    cache = TTLCache()
+    app.dependency_overrides[get_weather_cache] = lambda: cache
+
+    # ACT
+    response = client.get(
+        "/api/weather?country=Germany&city=%20BERLIN%20&departure_date=2023-01-05&return_date=2023-02-12"
+    )
+
+    # ASSERT
+    assert response.status_code == 200
+    assert [temp["temperature"] for temp in response.json()["temps"]] == [5, 5]
+    assert CountingWeatherQueries.calls == 2
+    assert store.stats() == {"hits": 2, "misses": 2, "months": 2, "normals": 0}
+    stats = client.get("/api/weather/stats").json()
+    assert stats["climatology"] == {"hits": 2, "misses": 2, "months": 2, "normals": 0}
+    assert stats["cache"]["misses"] == 2
+
+    # CLEAN UP
+    app.dependency_overrides = {}
+
+
+class ThreadRecordingStore(ClimatologyStore):
+    """
+    records the threads the store is read and written from
+    """
+
+    threads = set()
+
+    def get(self, city, country, month):
+        self.threads.add(threading.get_ident())
+        return super().get(city, country, month)
+
+    def put(self, city, country, month, temperature):
+        self.threads.add(threading.get_ident())
+        super().put(city, country, month, temperature)
+
+    def get_normals(self, city, country):
+        self.threads.add(threading.get_ident())
+        return super().get_normals(city, country)
+
+
+def test_temp_list_queries_the_store_off_the_event_loop():
+    """
+    tests that the SQLite store is not queried from the event loop's
+    thread, where it would block every other request
+    """
+    # ARRANGE
+    loop_threads = set()
+
+    class LoopRecordingWeatherQueries(FakeWeatherQueries):
+        async def get_weather(self, full_path):
+            loop_threads.add(threading.get_ident())
+            return await super().get_weather(full_path)
+
+    app.dependency_overrides[WeatherQueries] = LoopRecordingWeatherQueries
+    use_empty_store()
+    store = ThreadRecordingStore(":memory:")
+    app.dependency_overrides[get_climatology_store] = lambda: store
+
+    # ACT
+    response = client.get(
+        "/api/weather?country=germany&city=berlin&departure_date=2023-01-05&return_date=2023-02-12"
+    )
+
+    # ASSERT
+    assert response.status_code == 200
+    assert store.stats()["months"] == 2
+    assert store.threads and loop_threads
+    assert not store.threads & loop_threads
+
+    # CLEAN UP
+    app.dependency_overrides = {}
+
+
+def test_cache_evicts_least_recently_used():
+    """
+    tests that a full cache forgets the value used longest ago
+    """
+    # ARRANGE
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    # ACT
+    cache.set("c", 3)
+
+    # ASSERT
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_expires_values():
+    """
+    tests that values are forgotten once their time to live is over
+    """
+    # ARRANGE
+    cache = TTLCache(maxsize=2, ttl=0)
+    cache.set("a", 1)
+
+    # ACT
+    value = cache.get("a")
+
+    # ASSERT
+    assert value is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_cache_coalesces_concurrent_misses():
+    """
+    tests that concurrent misses for the same key share a single load
+    """
+    # ARRANGE
+    cache = TTLCache(maxsize=10, ttl=60)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return 42
+
+    async def lookup_many():
+        return await asyncio.gather(
+            *[cache.get_or_load("berlin", load) for _ in range(5)]
+        )
+
+    # ACT
+    values = asyncio.run(lookup_many())
+
+    # ASSERT
+    assert values == [42] * 5
+    assert len(loads) == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 4
+    assert cache.get("berlin") == 42
+
+
+def test_temp_list_reads_cached_months():
+    """
+    tests that a repeated request is answered from the in-memory cache
+    without reading the climatology store
+    """
+    # ARRANGE
+    app.dependency_overrides[WeatherQueries] = FakeWeatherQueries
+    store = use_empty_store()
+    client.get(
+        "/api/weather?country=germany&city=berlin&departure_date=2023-01-05&return_date=2023-02-12"
+    )
+
+    # ACT
+    response = client.get(
+        "/api/weather?country=GERMANY&city=berlin%20&departure_date=2023-01-05&return_date=2023-02-12"
+    )
+
+    # ASSERT
+    assert response.status_code == 200
+    assert [temp["temperature"] for temp in response.json()["temps"]] == [5, 5]
+    assert store.stats() == {"hits": 0, "misses": 2, "months": 2, "normals": 0}
+    stats = client.get("/api/weather/stats").json()
+    assert stats["cache"]["hits"] == 2
+    assert stats["cache"]["size"] == 2
+
+    # CLEAN UP
+    app.dependency_overrides = {}
+
+
+def test_monthly_normals_match_numpy():
+    """
+    tests the vectorized monthly statistics against computing each month
+    on its own with NumPy
+    """
+    # ARRANGE
+    dates = np.arange("2012-01-01", "2022-01-01", dtype="datetime64[D]")
+    rng = np.random.default_rng(7)
+    temperatures = rng.normal(50, 15, len(dates))
+    temperatures[::11] = np.nan
+    months = dates.astype("datetime64[M]").astype(int) % 12
+
+    # ACT
+    normals = monthly_normals(dates, temperatures)
+
+    # ASSERT
+    for month in range(12):
+        days = temperatures[(months == month) & ~np.isnan(temperatures)]
+        expected = [
+            days.mean(),
+            days.min(),
+            days.max(),
+            *np.percentile(days, [10, 50, 90]),
+        ]
+        np.testing.assert_allclose(normals[month], expected, rtol=1e-5)
+
+
+def test_temp_list_reads_normals():
+    """
+    tests that a destination with monthly normals is answered from them
+    without asking the weather API
+    """
+    # ARRANGE
+    app.dependency_overrides[WeatherQueries] = CountingWeatherQueries
+    CountingWeatherQueries.calls = 0
+    store = use_empty_store()
+    dates = np.arange("2020-01-01", "2022-01-01", dtype="datetime64[D]")
+    months = dates.astype("datetime64[M]").astype(int) % 12
+    ingest(store, "Berlin", "Germany", dates, months * 10.0)
+
+    # ACT
+    response = client.get(
+        "/api/weather?country=germany&city=berlin&departure_date=2023-01-05&return_date=2023-02-12"
+    )
+
+    # ASSERT
+    assert response.status_code == 200
+    temps = response.json()["temps"]
+    assert [temp["temperature"] for temp in temps] == [0, 10]
+    assert temps[1]["normals"] == {
+        "mean": 10,
+        "min": 10,
+        "max": 10,
+        "p10": 10,
+        "p50": 10,
+        "p90": 10,
+    }
+    assert CountingWeatherQueries.calls == 0
+
+    # CLEAN UP
+    app.dependency_overrides = {}
+
+
+def test_classify_trip_spanning_several_conditions():
+    """
+    tests that every month is classified and the trip lists each of its
+    conditions once, in the order they occur
+    """
+    # ARRANGE
+    temps = [
+        {"id": 0, "date": "June", "temperature": 72.5},
+        {"id": 1, "date": "July", "temperature": 80},
+        {"id": 2, "date": "August", "temperature": 60},
+        {"id": 3, "date": "September", "temperature": 55},
+    ]
+
+    # ACT
+    trip = classify_trip(temps)
+
+    # ASSERT
+    assert [temp["condition"] for temp in trip["temps"]] == [
+        "hot",
+        "hot",
+        "moderate",
+        "cold",
+    ]
+    assert trip["conditions"] == ["hot", "moderate", "cold"]
+    assert trip["condition"] == "moderate"
+
+
+def test_classification_thresholds_are_configurable(monkeypatch):
+    """
+    tests that the thresholds come from the service's settings
+    """
+    # ARRANGE
+    monkeypatch.setattr(main, "WEATHER_HOT_ABOVE", 85)
+    monkeypatch.setattr(main, "WEATHER_MODERATE_ABOVE", 40)
+
+    # ACT
+    conditions = [classify(temperature) for temperature in [90, 80, 40]]
+
+    # ASSERT
+    assert conditions == ["hot", "moderate", "cold"]
+
+
+def test_populate_keeps_the_months_fetched_before_a_failure(monkeypatch):
+    """
+    tests that a failed request does not lose the months that were
+    fetched by the same run
+    """
+    # ARRANGE
+    class FlakyWeatherQueries:
+        async def get_weather(self, full_path):
+            if "2021-03-01" in full_path:
+                raise RuntimeError("rate limited")
+            return {"days": [{"temp": 5}]}
+
+    monkeypatch.setattr(main, "WeatherQueries", FlakyWeatherQueries)
+    store = ClimatologyStore(":memory:")
+
+    # ACT
+    with pytest.raises(RuntimeError):
+        asyncio.run(populate(store, [("Berlin", "Germany")]))
+
+    # ASSERT
+    assert store.stats()["months"] == 11
+    assert store.get("Berlin", "Germany", 3) is None
+
+
+def test_backfill_stays_within_the_record_quota_and_resumes(monkeypatch):
+    """
+    tests that one backfill run only fetches the years that fit in its
+    records, and that the next run continues with the missing ones
+    """
+    # ARRANGE
+    requested = []
+
+    class DailyWeatherQueries:
+        async def get_weather(self, full_path):
+            year = int(full_path.split("/")[-1].split("?")[0][:4])
+            requested.append(year)
+            days = np.arange(
+                f"{year}-01-01", f"{year + 1}-01-01", dtype="datetime64[D]"
+            )
+            return {
+                "days": [{"datetime": str(day), "temp": float(year)} for day in days]
+            }
+
+    monkeypatch.setattr(main, "WeatherQueries", DailyWeatherQueries)
+    store = ClimatologyStore(":memory:")
+
+    # ACT
+    first_run = asyncio.run(
+        backfill_daily(store, "Berlin", "Germany", 2016, 2020, 1000)
+    )
+    first_requests = sorted(requested)
+    second_run = asyncio.run(
+        backfill_daily(store, "Berlin", "Germany", 2016, 2020, 1000)
+    )
+    third_run = asyncio.run(
+        backfill_daily(store, "Berlin", "Germany", 2016, 2020, 1000)
+    )
+    dates, temperatures = stored_daily(store, "Berlin", "Germany", 2016, 2020)
+
+    # ASSERT
+    assert first_requests == [2016, 2017]
+    assert [first_run, second_run, third_run] == [3, 1, 0]
+    assert sorted(requested) == [2016, 2017, 2018, 2019, 2020]
+    assert len(dates) == len(temperatures) == 366 + 365 + 365 + 365 + 366
+    assert temperatures[0] == 2016 and temperatures[-1] == 2020
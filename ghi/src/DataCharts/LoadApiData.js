@@ -17,8 +17,10 @@ export const loadWeatherData = async (
     throw new Error(`Failed to get weather data -- HTTP ${response.status}`);
   }
 
+  // the service classifies every month of the trip and returns the
+  // distinct conditions alongside the temperatures
   const responseJson = await response.json();
-  return responseJson.temps;
+  return { temps: responseJson.temps, conditions: responseJson.conditions };
 };
 
 // Flights feature not yet implemented into application
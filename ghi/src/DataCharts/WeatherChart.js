@@ -11,7 +11,7 @@ const useWeatherData = (
   destination_country,
   departure_date,
   return_date,
-  setTemperature
+  setConditions
 ) => {
   const [weather, setWeather] = useState([]);
 
@@ -23,9 +23,9 @@ const useWeatherData = (
         departure_date,
         return_date
       );
-      setWeather(weather_response);
-      if (setTemperature) {
-        setTemperature(weather_response);
+      setWeather(weather_response.temps);
+      if (setConditions) {
+        setConditions(weather_response.conditions);
       }
     }
     fetchData();
@@ -34,7 +34,7 @@ const useWeatherData = (
     destination_country,
     departure_date,
     return_date,
-    setTemperature,
+    setConditions,
   ]);
 
   return weather;
@@ -47,14 +47,14 @@ export default function WeatherChart(props) {
     departure_date,
     return_date,
     detail = null,
-    setTemperature = null,
+    setConditions = null,
   } = props;
   const weather = useWeatherData(
     destination_city,
     destination_country,
     departure_date,
     return_date,
-    setTemperature
+    setConditions
   );
 
   if (weather === undefined) {
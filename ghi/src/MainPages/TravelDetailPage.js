@@ -18,7 +18,7 @@ export default function TravelDetailPage() {
   const origin_code = searchParams.get("origin_code");
   const destination_city = searchParams.get("destination_city");
   const destination_country = searchParams.get("destination_country");
-  const [temperature, setTemperature] = useState(null);
+  const [conditions, setConditions] = useState(null);
   const destination_code = searchParams.get("destination_code");
   const departure_date = searchParams.get("departure_date");
   const return_date = searchParams.get("return_date");
@@ -43,7 +43,7 @@ export default function TravelDetailPage() {
               <SuggestedItems
                 setItems={setItems}
                 items={items}
-                temperature={temperature}
+                conditions={conditions}
               />
             </div>
             <div className="col-sm-12 col-md col-lg item-column detail-columns shadow">
@@ -64,7 +64,7 @@ export default function TravelDetailPage() {
                 departure_date={departure_date}
                 return_date={return_date}
                 origin_country={origin_country}
-                setTemperature={setTemperature}
+                setConditions={setConditions}
               />
               <div className="currency-data">
                 <CurrencyInfo
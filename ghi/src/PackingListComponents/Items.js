@@ -4,23 +4,13 @@ import { FontAwesomeIcon } from "@fortawesome/react-fontawesome";
 import { faPlusSquare } from "@fortawesome/free-solid-svg-icons";
 import AuthContext from "../context/AuthContext";
 import { useContext, useCallback, useMemo } from "react";
-function analyzeTemp(tempData) {
-  const temperature = tempData[0].temperature;
-  if (temperature > 70) {
-    return "hot";
-  } else if (temperature > 55) {
-    return "moderate";
-  } else {
-    return "cold";
-  }
-}
 
-export default function SuggestedItems({ setItems, items, temperature }) {
+export default function SuggestedItems({ setItems, items, conditions }) {
 
 //  Takes 3 parameters to determine the best suggested items for a user.
 //  setItems/items is used to pull items from our suggested list to be 
-//  rendered to the user. Temperature makes sure only items that fall under
-//  specific weather data points are rendered in the conditional items table. 
+//  rendered to the user. Conditions make sure only items that fall under
+//  the weather service's conditions are rendered in the conditional items table. 
 //  For example we would not want to suggest a heavy coat for a user if weather 
 //  data states it will be hot.
   const [conditionalItems, setConditionalItems] = useState([]);
@@ -74,11 +64,9 @@ export default function SuggestedItems({ setItems, items, temperature }) {
   validate();
 
   const fetchData = useCallback(async () => {
-    if (temperature) {
-      const response = await loadItemsList(
-        analyzeTemp(temperature),
-        fetchConfig
-      );
+    if (conditions) {
+      // the items for all of the trip's conditions are requested at once
+      const response = await loadItemsList(conditions.join(","), fetchConfig);
       const conditional = response.conditional_items.concat(
         response.user_favorite_items
       );
@@ -86,7 +74,7 @@ export default function SuggestedItems({ setItems, items, temperature }) {
       setConditionalItems(conditional);
       setGeneralItems(general);
     }
-  }, [fetchConfig, temperature]);
+  }, [fetchConfig, conditions]);
   useEffect(() => {
     fetchData();
   }, [fetchData]);
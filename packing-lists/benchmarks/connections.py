@@ -0,0 +1,75 @@
+"""
+Requests per second with and without persistent database connections
+
+Sends the same read-only request through the Django test client. The
+test client disconnects close_old_connections from request_started and
+request_finished, so the worker calls it around every request the way a
+real server does: a connection is opened and closed per request unless
+CONN_MAX_AGE keeps it. Each worker thread gets its own connection, the
+way each gunicorn worker would. Every mode is run once per setting of
+DATABASE_CONN_HEALTH_CHECKS.
+
+Run from the packing-lists directory against a PostgreSQL database that
+has been migrated:
+>>> DATABASE_URL=postgresql://... python -m benchmarks.connections --requests 2000
+"""
+import argparse
+import django
+import os
+import threading
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "packed.settings")
+django.setup()
+
+from django.db import close_old_connections, connection, connections  # noqa: E402
+from django.test import Client  # noqa: E402
+
+MODES = {
+    "new connection per request": {"CONN_MAX_AGE": 0},
+    "persistent, health checks": {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True},
+    "persistent, no health checks": {
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": False,
+    },
+}
+URL = "/api/items?name=passport"
+
+
+def worker(count):
+    client = Client(HTTP_HOST="localhost")
+    for _ in range(count):
+        close_old_connections()
+        response = client.get(URL)
+        close_old_connections()
+        assert response.status_code == 200, response.status_code
+    connections.close_all()
+
+
+def run(mode, requests, threads):
+    connections["default"].settings_dict.update(mode)
+    per_thread = requests // threads
+    pool = [threading.Thread(target=worker, args=(per_thread,)) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+    if connection.vendor != "postgresql":
+        parser.error("this benchmark needs a PostgreSQL DATABASE_URL")
+
+    print(f"{args.requests} x GET {URL}, {args.threads} threads")
+    for name, mode in MODES.items():
+        print(f"{name:30} {run(mode, args.requests, args.threads):8.1f} requests/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+EXPLAIN ANALYZE benchmark for the lookup indexes
+
+Seeds a PostgreSQL database with a synthetic data set (1,000,000 Items
+and PackingListItems by default), then runs EXPLAIN ANALYZE for the
+lookups the views make, first with the indexes from 0007_add_lookup_indexes
+dropped and then with them in place. Each run happens inside a
+transaction that is rolled back, so the database is left as it was
+found.
+
+Run from the packing-lists directory against a scratch database:
+>>> DATABASE_URL=postgresql://... python -m benchmarks.indexes --rows 1000000
+"""
+import argparse
+import django
+import os
+import re
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "packed.settings")
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+from packed_api.models import (  # noqa: E402
+    Item,
+    PackingList,
+    PackingListItem,
+    User,
+)
+
+USERS = 1000
+
+
+class Rollback(Exception):
+    pass
+
+
+def seed(cursor, rows):
+    cursor.execute(
+        f"""
+        INSERT INTO {User._meta.db_table}
+            (password, is_superuser, username, first_name, last_name,
+             email, is_staff, is_active, date_joined)
+        SELECT '', false, 'bench user ' || g, '', '',
+               'bench' || g || '@example.com', false, true, now()
+        FROM generate_series(1, %s) g
+        """,
+        [USERS],
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO {Item._meta.db_table} (name, suggested)
+        SELECT 'Bench Item ' || g, false
+        FROM generate_series(1, %s) g
+        """,
+        [rows],
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO {PackingList._meta.db_table}
+            (title, owner_id, created, departure_date, return_date,
+             completed, destination_city, destination_country, updated_at)
+        SELECT 'Bench List ' || g, u.id, now()::date - (g %% 1000),
+               NULL, NULL, false, '', '', now()
+        FROM generate_series(1, %s) g
+        JOIN (
+            SELECT id, row_number() OVER () AS n
+            FROM {User._meta.db_table}
+            WHERE username LIKE 'bench user %%'
+        ) u ON u.n = 1 + g %% %s
+        """,
+        [rows // 10, USERS],
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO {PackingListItem._meta.db_table}
+            (item_name_id, owner_id, quantity, packed, packing_list_id)
+        SELECT i.id, l.owner_id, 1, false, l.id
+        FROM (
+            SELECT id, row_number() OVER () AS n
+            FROM {Item._meta.db_table}
+            WHERE name LIKE 'Bench Item %%'
+        ) i
+        JOIN (
+            SELECT id, owner_id, row_number() OVER () AS n
+            FROM {PackingList._meta.db_table}
+            WHERE title LIKE 'Bench List %%'
+        ) l ON l.n = 1 + i.n %% %s
+        """,
+        [rows // 10],
+    )
+    for model in (User, Item, PackingList, PackingListItem):
+        cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+
+def lookups(rows):
+    user = User.objects.filter(username="bench user 7").first()
+    name = f"Bench Item {rows // 2}"
+    return {
+        "Item by exact name": Item.objects.filter(name=name),
+        "Item by case-insensitive name": Item.objects.filter(name__iexact=name.upper()),
+        "user favorites": Item.objects.filter(packing_lists__owner=user),
+        "PackingListItems by owner and item": PackingListItem.objects.filter(
+            owner=user, item_name__name=name
+        ),
+        "PackingLists by owner, newest first": PackingList.objects.filter(
+            owner=user
+        ).order_by("-created")[:20],
+    }
+
+
+def explain(cursor, queryset):
+    sql, params = queryset.query.sql_with_params()
+    cursor.execute("EXPLAIN ANALYZE " + sql, params)
+    plan = [row[0] for row in cursor.fetchall()]
+    execution = re.search(r"Execution Time: ([\d.]+) ms", plan[-1])
+    return float(execution.group(1)), plan[0]
+
+
+def run(rows):
+    indexes = [
+        index.name
+        for model in (Item, PackingList, PackingListItem)
+        for index in model._meta.indexes
+    ]
+    results = {}
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            seed(cursor, rows)
+            for index in indexes:
+                cursor.execute(f"DROP INDEX {connection.ops.quote_name(index)}")
+            for name, queryset in lookups(rows).items():
+                results[name] = [explain(cursor, queryset)]
+            raise Rollback
+    except Rollback:
+        pass
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            seed(cursor, rows)
+            for name, queryset in lookups(rows).items():
+                results[name].append(explain(cursor, queryset))
+            raise Rollback
+    except Rollback:
+        pass
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    if connection.vendor != "postgresql":
+        parser.error("this benchmark needs a PostgreSQL DATABASE_URL")
+
+    results = run(args.rows)
+    print(f"{args.rows} rows, EXPLAIN ANALYZE execution time")
+    for name, ((before, before_plan), (after, after_plan)) in results.items():
+        print(f"{name}")
+        print(f"  without indexes: {before:10.3f} ms  {before_plan}")
+        print(f"  with indexes:    {after:10.3f} ms  {after_plan}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Refresh latency benchmark for the token blacklist tables
+
+Seeds a PostgreSQL database with a synthetic token history (10,000,000
+outstanding tokens by default, half of them expired and blacklisted, as
+rotation leaves them), then times POST /auth/token/refresh/, first with
+every row in place and the expires_at index from
+0010_outstandingtoken_expires_at_index dropped, then after
+'prune_expired_tokens' has run with the index in place. Each run happens
+inside a transaction that is rolled back, so the database is left as it
+was found.
+
+Run from the packing-lists directory against a scratch database:
+>>> DATABASE_URL=postgresql://... python -m benchmarks.tokens --rows 10000000
+"""
+import argparse
+import django
+import os
+import statistics
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "packed.settings")
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+from django.test import Client  # noqa: E402
+from rest_framework_simplejwt.token_blacklist.models import (  # noqa: E402
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+from packed_api.models import User  # noqa: E402
+from packed_api.tokens import prune_expired_tokens  # noqa: E402
+
+INDEX_NAME = "token_blacklist_outstandingtoken_expires_at"
+URL = "/auth/token/refresh/"
+
+
+class Rollback(Exception):
+    pass
+
+
+def seed(cursor, rows):
+    user = User.objects.create_user(username="bench token user", password="password")
+    # odd rows expired up to 90 days ago and were blacklisted when they were
+    # rotated, even rows expire within the next 90 days
+    cursor.execute(
+        f"""
+        INSERT INTO {OutstandingToken._meta.db_table}
+            (user_id, jti, token, created_at, expires_at)
+        SELECT %s, 'bench-' || g, '', now() - interval '90 days',
+               now() + (CASE WHEN g %% 2 = 1 THEN -1 ELSE 1 END)
+                   * (g %% 7776000) * interval '1 second'
+        FROM generate_series(1, %s) g
+        """,
+        [user.id, rows],
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO {BlacklistedToken._meta.db_table} (token_id, blacklisted_at)
+        SELECT id, created_at
+        FROM {OutstandingToken._meta.db_table}
+        WHERE jti LIKE 'bench-%%' AND expires_at < now()
+        """
+    )
+    for model in (OutstandingToken, BlacklistedToken):
+        cursor.execute(f"ANALYZE {model._meta.db_table}")
+    return user
+
+
+def time_refreshes(user, count):
+    client = Client(HTTP_HOST="localhost")
+    refresh = str(RefreshToken.for_user(user))
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = client.post(
+            URL, {"refresh": refresh}, content_type="application/json"
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.status_code
+        refresh = response.json()["refresh"]
+    return statistics.median(timings), max(timings)
+
+
+def run(rows, refreshes):
+    results = {}
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            user = seed(cursor, rows)
+            cursor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+            results["before pruning, no index"] = time_refreshes(user, refreshes)
+            raise Rollback
+    except Rollback:
+        pass
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            user = seed(cursor, rows)
+            start = time.perf_counter()
+            prune_expired_tokens()
+            results["pruning"] = ((time.perf_counter() - start) * 1000, None)
+            results["after pruning, with index"] = time_refreshes(user, refreshes)
+            raise Rollback
+    except Rollback:
+        pass
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--refreshes", type=int, default=200)
+    args = parser.parse_args()
+    if connection.vendor != "postgresql":
+        parser.error("this benchmark needs a PostgreSQL DATABASE_URL")
+
+    results = run(args.rows, args.refreshes)
+    print(f"{args.rows} outstanding tokens, {args.refreshes} refreshes")
+    for name, (median, slowest) in results.items():
+        if slowest is None:
+            print(f"  {name:28} {median:10.1f} ms")
+        else:
+            print(f"  {name:28} {median:10.3f} ms median  {slowest:10.3f} ms max")
+
+
+if __name__ == "__main__":
+    main()
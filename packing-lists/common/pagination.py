@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.db.models import Q
+import base64
+import binascii
+import json
+
+
+class InvalidPage(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    data = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor, fields):
+    """
+    Arguments:
+    - an opaque cursor made by 'encode_cursor'
+    - the model fields the cursor holds values for
+
+    Returns: a list of the cursor's values converted for each field
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(data)
+    except (binascii.Error, ValueError):
+        raise InvalidPage("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise InvalidPage("Invalid cursor")
+    try:
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except Exception:
+        raise InvalidPage("Invalid cursor")
+
+
+def after_cursor(keys, values):
+    """
+    Builds the filter for the rows that come after a cursor when
+    ordering by 'keys', e.g. (a > 1) OR (a = 1 AND b > 2)
+    """
+    condition = Q()
+    for index, key in enumerate(keys):
+        equal = {keys[i]: values[i] for i in range(index)}
+        condition |= Q(**equal, **{f"{key}__gt": values[index]})
+    return condition
+
+
+def paginate(request, queryset, keys=("id",), default_limit=None):
+    """
+    Keyset (cursor) pagination for list endpoints. Rows are ordered by
+    'keys', which must end with a unique column, and each page starts
+    right after the last row of the previous one. Rows inserted while
+    a client pages through the list therefore never shift a page.
+
+    Pagination is opt-in: without a '?limit=' or '?after=' parameter
+    the whole queryset is returned, unless a default limit is given.
+
+    Arguments:
+    - the request, read for the 'limit' and 'after' parameters
+    - the queryset to paginate
+    - the columns to order by
+    - default_limit: the page size used when no 'limit' is given, which
+    makes pagination mandatory. PAGINATION_DEFAULT_LIMIT is used when
+    it is None
+
+    Returns: a tuple of the rows to encode and a dictionary to merge
+    into the response, holding the 'next' cursor or None on the last
+    page. The dictionary is empty when no page was asked for.
+
+    Raises InvalidPage when 'limit' or 'after' is not valid
+    """
+    limit = request.GET.get("limit")
+    after = request.GET.get("after")
+    if limit is None and after is None and default_limit is None:
+        return queryset, {}
+    if default_limit is None:
+        default_limit = settings.PAGINATION_DEFAULT_LIMIT
+    try:
+        limit = int(limit) if limit is not None else default_limit
+    except ValueError:
+        raise InvalidPage("Invalid limit")
+    if limit < 1:
+        raise InvalidPage("Invalid limit")
+    limit = min(limit, settings.PAGINATION_MAX_LIMIT)
+
+    queryset = queryset.order_by(*keys)
+    if after:
+        fields = [queryset.model._meta.get_field(key) for key in keys]
+        queryset = queryset.filter(after_cursor(keys, decode_cursor(after, fields)))
+    rows = list(queryset[: limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            [queryset.model._meta.get_field(key).value_to_string(last) for key in keys]
+        )
+    return rows, {"next": next_cursor}
@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "packed.settings")
 
 application = get_asgi_application()
+
+from packed_api.tokens import start_scheduled_pruning  # noqa: E402
+
+start_scheduled_pruning()
@@ -54,9 +54,17 @@ MIDDLEWARE = [
 
 AUTH_USER_MODEL = "packed_api.User"
 
+# 'claims' builds request.user from the access token and only checks that
+# the user is still active, against a cache kept for AUTH_USER_CACHE_TIMEOUT
+# seconds. 'model' loads the User from the database on every request
+JWT_AUTH_MODE = os.environ.get("JWT_AUTH_MODE", "claims")
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get("AUTH_USER_CACHE_TIMEOUT", 60))
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "packed_api.authentication.ClaimsJWTAuthentication"
+        if JWT_AUTH_MODE == "claims"
+        else "rest_framework_simplejwt.authentication.JWTAuthentication",
     )
 }
 
@@ -86,6 +94,12 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
 }
 
+# expired refresh tokens are deleted by 'manage.py prune_tokens', e.g. from
+# cron. Setting TOKEN_PRUNE_INTERVAL above 0 also prunes every that many
+# seconds from a thread of the WSGI/ASGI server processes
+TOKEN_PRUNE_INTERVAL = int(os.environ.get("TOKEN_PRUNE_INTERVAL", 0))
+TOKEN_PRUNE_BATCH_SIZE = int(os.environ.get("TOKEN_PRUNE_BATCH_SIZE", 10000))
+
 ALLOWED_HOSTS = [
     ".localhost",
     "127.0.0.1",
@@ -108,6 +122,34 @@ CSRF_TRUSTED_ORIGINS = [
     f"https://{os.environ.get('DEPLOYED_HOST')}",
 ]
 
+# the most items 'api_conditional_items' suggests from a user's own
+# packing history
+USER_FAVORITE_ITEMS_LIMIT = int(os.environ.get("USER_FAVORITE_ITEMS_LIMIT", 50))
+
+# seconds the condition based item suggestions are cached for. Saving or
+# deleting an Item, Condition or Category invalidates them right away
+SUGGESTIONS_CACHE_TIMEOUT = int(os.environ.get("SUGGESTIONS_CACHE_TIMEOUT", 3600))
+
+# the longest trip 'api_upcoming_packing_lists' treats as still in progress
+MAX_TRIP_DAYS = int(os.environ.get("MAX_TRIP_DAYS", 365))
+
+# the most packing lists 'api_packing_lists_batch' returns in one response
+PACKING_LIST_BATCH_MAX = int(os.environ.get("PACKING_LIST_BATCH_MAX", 100))
+
+# page sizes for the list endpoints that accept '?limit=' and '?after='
+PAGINATION_DEFAULT_LIMIT = int(os.environ.get("PAGINATION_DEFAULT_LIMIT", 100))
+PAGINATION_MAX_LIMIT = int(os.environ.get("PAGINATION_MAX_LIMIT", 500))
+
+# rows fetched and encoded at a time by the '?stream=true' list responses
+STREAMING_CHUNK_SIZE = int(os.environ.get("STREAMING_CHUNK_SIZE", 2000))
+
+# the library ModelEncoder uses to write JSON: 'stdlib' writes exactly what
+# the json module does, 'orjson' is faster but NOT byte-compatible. It
+# writes compact separators and raw UTF-8 instead of \uXXXX escapes, so the
+# bodies differ while decoding to the same data. The ETags are derived from
+# versions and update times, not from the bodies, and do not change
+JSON_BACKEND = os.environ.get("JSON_BACKEND", "stdlib")
+
 
 DJWTO_MODE = "TWO-COOKIES"
 DJWTO_ACCESS_TOKEN_LIFETIME = None
@@ -135,8 +177,35 @@ WSGI_APPLICATION = "packed.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
+# DATABASE_CONN_MAX_AGE keeps a connection open for that many seconds so
+# requests served by the same worker reuse it instead of connecting to
+# PostgreSQL every time. 0 (the default) closes it after every request.
+# Reused connections are checked before each request while
+# DATABASE_CONN_HEALTH_CHECKS is on, so one that the server dropped is
+# replaced instead of failing the request.
+# For pooling across workers, run PgBouncer in front of PostgreSQL.
+
 DATABASES = {}
-DATABASES["default"] = dj_database_url.config()
+DATABASES["default"] = dj_database_url.config(
+    conn_max_age=int(os.environ.get("DATABASE_CONN_MAX_AGE", 0))
+)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = (
+    os.environ.get("DATABASE_CONN_HEALTH_CHECKS", "true").lower() == "true"
+)
+
+# Caches
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# the local memory cache is private to each process, point CACHE_BACKEND and
+# CACHE_LOCATION at a shared cache such as Redis when running several workers
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
 
 
 # Password validation
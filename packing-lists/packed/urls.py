@@ -3,6 +3,7 @@ from django.urls import path, include
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("api/async/", include("packed_api.async_urls")),
     path("api/", include("packed_api.urls")),
     path("api/", include("packed_api.urls")),
     path("auth/", include("packed_api.auth.urls")),
@@ -0,0 +1,25 @@
+from django.urls import path
+from .async_views import (
+    api_conditional_items,
+    api_packing_lists,
+    api_packing_list_items,
+    api_packing_list,
+)
+
+# async versions of the read-heavy GET endpoints, served under /api/async/
+# with the same paths as in packed_api/urls.py. They only pay off when the
+# service runs under an ASGI server such as uvicorn
+urlpatterns = [
+    path(
+        "items/conditions/<str:condition>/",
+        api_conditional_items,
+        name="async_api_conditional_items",
+    ),
+    path("packing_lists/", api_packing_lists, name="async_api_packing_lists"),
+    path("packing_lists/<int:pk>/", api_packing_list, name="async_api_packing_list"),
+    path(
+        "packing_lists/<int:pk>/items/",
+        api_packing_list_items,
+        name="async_api_packing_list_items",
+    ),
+]
@@ -0,0 +1,144 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.db import close_old_connections
+from django.http import HttpResponseNotAllowed, JsonResponse
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from functools import wraps
+from .views import (
+    conditional_items_response,
+    packing_list_items_response,
+    packing_list_response,
+    packing_lists_response,
+)
+
+
+def database_sync_to_async(function):
+    """
+    Wraps a function that uses the ORM so it can be awaited. Under ASGI,
+    Django runs every sync view in one shared thread, whereas these calls
+    run in the event loop's thread pool, so the queries of concurrent
+    requests run side by side. Django 4.0 has no async ORM, so this is
+    the only way to query from an async view.
+
+    Each call closes its thread's database connection when it is no
+    longer usable or CONN_MAX_AGE has expired, the way a request does.
+
+    Arguments: a sync function
+
+    Returns: an async function taking the same arguments
+    """
+
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False)
+
+
+async def authenticate(request):
+    """
+    The async counterpart of the JWT authentication class DRF uses for the
+    sync views. The token is checked in the event loop, only the User, or
+    its cached status in JWT_AUTH_MODE 'claims', is looked up in the
+    thread pool.
+
+    Arguments: the request, read for its Authorization header
+
+    Returns: the User the access token belongs to, or None when the
+    request has no token
+
+    Raises AuthenticationFailed when the token is invalid or expired, or
+    the User no longer exists
+    """
+    (authentication_class,) = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    authentication = authentication_class()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    validated_token = authentication.get_validated_token(raw_token)
+    return await database_sync_to_async(authentication.get_user)(validated_token)
+
+
+def authentication_error(detail, status=401):
+    response = JsonResponse(detail, status=status)
+    response["WWW-Authenticate"] = JWTAuthentication().authenticate_header(None)
+    return response
+
+
+def async_api_view(login_required=True):
+    """
+    Decorates an async GET view the way @api_view and @permission_classes
+    decorate the sync ones: other methods receive a 405, request.user is
+    set from the JWT access token, and requests without a valid token
+    receive a 401 when 'login_required' is True
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method != "GET":
+                return HttpResponseNotAllowed(["GET"])
+            try:
+                user = await authenticate(request)
+            except AuthenticationFailed as error:
+                return authentication_error(error.detail, error.status_code)
+            if user is None and login_required:
+                return authentication_error(
+                    {"detail": "Authentication credentials were not provided."}
+                )
+            request.user = user if user is not None else AnonymousUser()
+            return await view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@async_api_view(login_required=False)
+async def api_conditional_items(request, condition):
+    """
+    The async version of 'views.api_conditional_items'
+    """
+    user = request.user if request.user.is_authenticated else None
+    return await database_sync_to_async(conditional_items_response)(
+        request, user, condition
+    )
+
+
+@async_api_view()
+async def api_packing_lists(request):
+    """
+    The async version of 'views.api_packing_lists' GET. '?stream=true' is
+    only served by the sync view, since Django 4.0 writes streaming
+    responses from the event loop, where the ORM cannot be used
+    """
+    if request.GET.get("stream") == "true":
+        return JsonResponse(
+            {"message": "Streaming is only available from /api/packing_lists/"},
+            status=400,
+        )
+    return await database_sync_to_async(packing_lists_response)(request, request.user)
+
+
+@async_api_view()
+async def api_packing_list(request, pk):
+    """
+    The async version of 'views.api_packing_list' GET
+    """
+    return await database_sync_to_async(packing_list_response)(request, pk)
+
+
+@async_api_view()
+async def api_packing_list_items(request, pk):
+    """
+    The async version of 'views.api_packing_list_items' GET
+    """
+    return await database_sync_to_async(packing_list_items_response)(request, pk)
@@ -80,3 +80,10 @@ class PackingListEncoder(ModelEncoder):
         "destination_country",
         "origin_country",
     ]
+
+
+class PackingListWithItemsEncoder(PackingListEncoder):
+    properties = PackingListEncoder.properties + ["items"]
+    encoders = {
+        "items": PackingListItemEncoder(),
+    }
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from ...tokens import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Deletes expired outstanding and blacklisted refresh tokens"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="rows deleted per query, TOKEN_PRUNE_BATCH_SIZE by default",
+        )
+
+    def handle(self, *args, batch_size=None, **options):
+        blacklisted, outstanding = prune_expired_tokens(batch_size=batch_size)
+        self.stdout.write(
+            f"Deleted {blacklisted} blacklisted and {outstanding} outstanding tokens"
+        )
@@ -0,0 +1,36 @@
+# Generated by Django 4.0.3 on 2026-10-18 18:03
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("packed_api", "0006_alter_condition_name"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="item",
+            index=models.Index(fields=["name"], name="item_name"),
+        ),
+        migrations.AddIndex(
+            model_name="item",
+            index=models.Index(
+                django.db.models.functions.text.Upper("name"), name="item_name_upper"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="packinglist",
+            index=models.Index(
+                fields=["owner", "created"], name="packinglist_owner_created"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="packinglistitem",
+            index=models.Index(
+                fields=["owner", "item_name"], name="packinglistitem_owner_item"
+            ),
+        ),
+    ]
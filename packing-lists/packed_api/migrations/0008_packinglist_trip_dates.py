@@ -0,0 +1,94 @@
+# Generated by Django 4.0.3 on 2026-10-18 18:04
+
+from datetime import datetime
+from django.db import migrations, models
+
+LEGACY_DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%Y/%m/%d", "%d.%m.%Y"]
+
+
+def parse_legacy_date(value):
+    # the old columns were free text, anything that isn't a date becomes NULL
+    value = (value or "").strip()
+    for date_format in LEGACY_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def copy_trip_dates(apps, schema_editor):
+    PackingList = apps.get_model("packed_api", "PackingList")
+    packing_lists = []
+    for packing_list in PackingList.objects.only(
+        "id", "departure_date", "return_date"
+    ).iterator():
+        packing_list.departure_on = parse_legacy_date(packing_list.departure_date)
+        packing_list.return_on = parse_legacy_date(packing_list.return_date)
+        packing_lists.append(packing_list)
+    PackingList.objects.bulk_update(
+        packing_lists, ["departure_on", "return_on"], batch_size=1000
+    )
+
+
+def copy_trip_dates_back(apps, schema_editor):
+    PackingList = apps.get_model("packed_api", "PackingList")
+    packing_lists = []
+    for packing_list in PackingList.objects.only(
+        "id", "departure_on", "return_on"
+    ).iterator():
+        packing_list.departure_date = (
+            packing_list.departure_on.isoformat() if packing_list.departure_on else ""
+        )
+        packing_list.return_date = (
+            packing_list.return_on.isoformat() if packing_list.return_on else ""
+        )
+        packing_lists.append(packing_list)
+    PackingList.objects.bulk_update(
+        packing_lists, ["departure_date", "return_date"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("packed_api", "0007_add_lookup_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="packinglist",
+            name="departure_on",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="packinglist",
+            name="return_on",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(copy_trip_dates, copy_trip_dates_back),
+        migrations.RemoveField(
+            model_name="packinglist",
+            name="departure_date",
+        ),
+        migrations.RemoveField(
+            model_name="packinglist",
+            name="return_date",
+        ),
+        migrations.RenameField(
+            model_name="packinglist",
+            old_name="departure_on",
+            new_name="departure_date",
+        ),
+        migrations.RenameField(
+            model_name="packinglist",
+            old_name="return_on",
+            new_name="return_date",
+        ),
+        migrations.AddIndex(
+            model_name="packinglist",
+            index=models.Index(
+                fields=["owner", "departure_date"], name="packinglist_owner_departure"
+            ),
+        ),
+    ]
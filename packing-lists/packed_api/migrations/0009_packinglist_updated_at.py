@@ -0,0 +1,22 @@
+# Generated by Django 4.0.3 on 2026-10-18 19:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("packed_api", "0008_packinglist_trip_dates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="packinglist",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
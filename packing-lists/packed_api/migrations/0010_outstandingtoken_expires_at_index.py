@@ -0,0 +1,32 @@
+from django.db import migrations
+
+INDEX_NAME = "token_blacklist_outstandingtoken_expires_at"
+
+
+def create_index(apps, schema_editor):
+    # 'prune_tokens' deletes tokens by expiry. The table can hold millions
+    # of rows, so PostgreSQL builds the index without blocking refreshes
+    concurrently = (
+        "CONCURRENTLY " if schema_editor.connection.vendor == "postgresql" else ""
+    )
+    schema_editor.execute(
+        f"CREATE INDEX {concurrently}IF NOT EXISTS {INDEX_NAME} "
+        "ON token_blacklist_outstandingtoken (expires_at)"
+    )
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("packed_api", "0009_packinglist_updated_at"),
+        ("token_blacklist", "0012_alter_outstandingtoken_user"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,5 +1,44 @@
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
+from contextlib import contextmanager
+import threading
+
+# the ids of the PackingLists to touch when the innermost 'batch_touches'
+# block of this thread exits, None outside of one
+_touch_batch = threading.local()
+
+
+@contextmanager
+def batch_touches():
+    """
+    Within the block, the PackingLists touched by 'touch_packing_lists',
+    which PackingListItem writes and 'PackingList.touch' go through, are
+    collected and marked as changed with one query when the block exits
+    without an error
+    """
+    if getattr(_touch_batch, "ids", None) is not None:
+        yield
+        return
+    _touch_batch.ids = ids = set()
+    try:
+        yield
+    finally:
+        _touch_batch.ids = None
+    touch_packing_lists(ids)
+
+
+def touch_packing_lists(ids):
+    """
+    Marks the PackingLists with these ids as changed, at the end of the
+    current 'batch_touches' block if there is one
+    """
+    batch = getattr(_touch_batch, "ids", None)
+    if batch is not None:
+        batch.update(ids)
+    elif ids:
+        PackingList.objects.filter(id__in=ids).update(updated_at=timezone.now())
 
 
 class User(AbstractUser):
@@ -15,16 +54,46 @@ class PackingList(models.Model):
         User, related_name="packing_lists", on_delete=models.CASCADE
     )
     created = models.DateField(auto_now_add=True)
-    departure_date = models.CharField(max_length=10, blank=True)
-    return_date = models.CharField(max_length=10, blank=True)
+    departure_date = models.DateField(null=True, blank=True)
+    return_date = models.DateField(null=True, blank=True)
     completed = models.BooleanField(default=False)
     destination_city = models.CharField(max_length=70, blank=True)
     destination_country = models.CharField(max_length=70, blank=True)
     origin_country = models.CharField(max_length=70, null=True)
+    # bumped whenever the list or one of its items changes, the packing
+    # list endpoints derive their ETag headers from it
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "created"], name="packinglist_owner_created"),
+            models.Index(
+                fields=["owner", "departure_date"], name="packinglist_owner_departure"
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def touch(self):
+        """
+        Marks the list as changed without saving its other fields. Bulk
+        writes to its PackingListItems call this since they send no
+        post_save signal, see 'signals.touch_packing_list'
+        """
+        self.updated_at = timezone.now()
+        touch_packing_lists([self.id])
+
+    @classmethod
+    def touch_lists_with_item(cls, item_id):
+        """
+        Marks every list holding the Item as changed, since the Item's
+        name and category are part of the lists' encoded items
+        """
+        cls.objects.filter(items__item_name_id=item_id).update(
+            updated_at=timezone.now()
+        )
+
 
 # the category model holds categories for items a user can pack such as
 # electronics or clothing
@@ -64,6 +133,14 @@ class Item(models.Model):
         blank=True,
     )
 
+    # items are looked up by exact name whenever a packing list is saved,
+    # and by case-insensitive name (name__iexact) on the items list
+    class Meta:
+        indexes = [
+            models.Index(fields=["name"], name="item_name"),
+            models.Index(Upper("name"), name="item_name_upper"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -84,5 +161,12 @@ class PackingListItem(models.Model):
         PackingList, related_name="items", on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["owner", "item_name"], name="packinglistitem_owner_item"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.item_name.name} ({self.quantity}) for {self.packing_list.title}"
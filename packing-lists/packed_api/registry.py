@@ -0,0 +1,130 @@
+from django.core.cache import cache
+from django.db import transaction
+from functools import partial
+import threading
+import time
+from .models import Category, Condition
+
+CATALOG_VERSION_KEY = "suggestions:version"
+REFERENCE_VERSION_KEY = "registry:version"
+
+
+def get_version(key):
+    return cache.get_or_set(key, time.time_ns(), timeout=None)
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # the version was evicted, start from a value no older entry used
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def get_catalog_version():
+    """
+    Returns: the current version of the item catalog. Every cached
+    suggestion is tied to this version, so bumping it invalidates all of
+    them at once
+    """
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """
+    Invalidates every cached suggestion. Called whenever a catalog Item,
+    a Condition or a Category is saved or deleted, see the receivers in
+    signals.py
+
+    Inside a transaction the version is only bumped once it commits,
+    otherwise a concurrent request could cache the rows it read before
+    the commit under the new version
+    """
+    transaction.on_commit(partial(bump_version, CATALOG_VERSION_KEY))
+
+
+def get_reference_version():
+    """
+    Returns: the current version of the Category and Condition tables,
+    which every registry snapshot is tied to
+    """
+    return get_version(REFERENCE_VERSION_KEY)
+
+
+def bump_reference_version():
+    """
+    Invalidates every registry snapshot. Called whenever a Condition or
+    Category is saved or deleted, but not for Items, which users create
+    all the time. Like 'bump_catalog_version' it waits for the commit
+    """
+    transaction.on_commit(partial(bump_version, REFERENCE_VERSION_KEY))
+
+
+class ReferenceRegistry:
+    """
+    A process-local copy of a small reference table such as Category or
+    Condition. Every row is loaded with one query the first time the
+    registry is used, after which rows are looked up by name or id from
+    memory.
+
+    The copy is reloaded when the reference version changes, which
+    happens when any Category or Condition is saved, updated or deleted,
+    in this process or in another one sharing the cache. The instances are shared
+    between requests and must not be modified.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def _load(self):
+        version = get_reference_version()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0] == version:
+            return snapshot
+        with self._lock:
+            if self._snapshot is not None and self._snapshot[0] == version:
+                return self._snapshot
+            rows = list(self.model.objects.order_by("id"))
+            by_name = {row.name: row for row in rows}
+            by_id = {row.id: row for row in rows}
+            self._snapshot = (version, rows, by_name, by_id)
+            return self._snapshot
+
+    def all(self):
+        """
+        Returns: a list of every row, ordered by id
+        """
+        return list(self._load()[1])
+
+    def get(self, name=None, id=None):
+        """
+        Arguments: either the name or the id of a row
+
+        Returns: the model instance
+
+        Raises the model's DoesNotExist when there is no such row
+        """
+        _, _, by_name, by_id = self._load()
+        row = by_name.get(name) if id is None else by_id.get(_as_id(id))
+        if row is None:
+            raise self.model.DoesNotExist(
+                f"{self.model.__name__} matching name={name!r} id={id!r} does not exist"
+            )
+        return row
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+
+
+def _as_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+categories = ReferenceRegistry(Category)
+conditions = ReferenceRegistry(Condition)
@@ -0,0 +1,93 @@
+from django.core.signals import request_started
+from django.db import connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+import django
+from .authentication import forget_user
+from .models import (
+    Category,
+    Condition,
+    Item,
+    PackingList,
+    PackingListItem,
+    User,
+    touch_packing_lists,
+)
+from .registry import bump_catalog_version, bump_reference_version, conditions
+
+
+def is_user_item(item):
+    try:
+        return conditions.get(id=item.condition_id).name == "user"
+    except Condition.DoesNotExist:
+        return False
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def invalidate_suggestions(sender, instance, **kwargs):
+    """
+    Invalidates the cached suggestions when a catalog Item changes. The
+    Items users create for themselves are never suggested, so they only
+    do when an update may have moved the Item into or out of the catalog
+    """
+    moved = not kwargs.get("created", True) and (
+        kwargs.get("update_fields") is None or "condition" in kwargs["update_fields"]
+    )
+    if moved or not is_user_item(instance):
+        bump_catalog_version()
+
+
+@receiver(post_save, sender=Condition)
+@receiver(post_delete, sender=Condition)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_references(sender, **kwargs):
+    # the suggestions hold the names of their items' categories and
+    # conditions, so they are invalidated too
+    bump_reference_version()
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=PackingListItem)
+@receiver(post_delete, sender=PackingListItem)
+def touch_packing_list(sender, instance, **kwargs):
+    """
+    Marks the PackingList of a saved or deleted PackingListItem as
+    changed. post_delete is also sent for the rows a cascade deletes,
+    e.g. when their Item is deleted, deleting many rows in a
+    'batch_touches' block touches each list once. Bulk writes send no
+    signals and call 'PackingList.touch' themselves
+    """
+    touch_packing_lists([instance.packing_list_id])
+
+
+@receiver(post_save, sender=Item)
+def touch_packing_lists_of_item(sender, instance, created, **kwargs):
+    if not created:
+        PackingList.touch_lists_with_item(instance.id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_status(sender, instance, **kwargs):
+    forget_user(instance.id)
+
+
+def check_database_connections(**kwargs):
+    """
+    Closes reused database connections the server has dropped, so the
+    request opens a new one instead of failing. Django does this itself
+    for CONN_HEALTH_CHECKS from 4.1 on
+    """
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if not connection.settings_dict.get("CONN_HEALTH_CHECKS"):
+            continue
+        if not connection.is_usable():
+            connection.close()
+
+
+if django.VERSION < (4, 1):
+    request_started.connect(check_database_connections)
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min
+from django.db.models.functions import Lower
+from .encoders import ItemEncoder
+from .models import Item
+from .registry import conditions, get_catalog_version
+
+
+def get_catalog_suggestions(condition_names):
+    """
+    This is a helper function used by 'api_conditional_items' that
+    returns the catalog part of the suggestions for one or more conditions
+
+    The suggested items are stored already serialized, keyed by the
+    condition names and the catalog version. The conditional items are
+    the union of the items of every condition, with one item per
+    case-insensitive name, the lowest id, chosen in the query.
+
+    Arguments:
+    - a sorted list of the names of existing conditions, 'any' is left out
+
+    Returns: a tuple of the catalog version and a dictionary with the
+    serialized 'conditional_items' and 'general_items' and the ids of
+    the conditions they were suggested for in 'condition_ids'
+
+    Raises Condition.DoesNotExist when a condition, or the 'any'
+    condition, is not in the database
+    """
+    version = get_catalog_version()
+    key = f"suggestions:{version}:{','.join(condition_names)}"
+    catalog = cache.get(key)
+    if catalog is None:
+        encoder = ItemEncoder()
+        any_condition = conditions.get(name="any")
+        condition_ids = [any_condition.id]
+        conditional_items = []
+        if condition_names:
+            condition_ids += [conditions.get(name=name).id for name in condition_names]
+            first_of_each_name = (
+                Item.objects.filter(condition__in=condition_ids[1:])
+                .annotate(lower_name=Lower("name"))
+                .values("lower_name")
+                .annotate(first_id=Min("id"))
+                .values("first_id")
+            )
+            conditional_items = ItemEncoder.optimize_queryset(
+                Item.objects.filter(id__in=first_of_each_name).order_by("id")
+            )
+        general_items = ItemEncoder.optimize_queryset(
+            Item.objects.filter(condition=any_condition)
+        )
+        catalog = {
+            "conditional_items": [encoder.default(item) for item in conditional_items],
+            "general_items": [encoder.default(item) for item in general_items],
+            "condition_ids": condition_ids,
+        }
+        cache.set(key, catalog, timeout=settings.SUGGESTIONS_CACHE_TIMEOUT)
+    return version, catalog
@@ -0,0 +1,82 @@
+from django.test import AsyncClient, TransactionTestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+import json
+from ..models import Category, Condition, Item, PackingList, User
+
+
+class AsyncViewTests(TransactionTestCase):
+    # the async views query from the thread pool, which only sees
+    # committed rows, so the rows are committed instead of rolled back
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="traveler", email="traveler@example.com", password="password"
+        )
+        self.packing_list = PackingList.objects.create(
+            title="Berlin", owner=self.user, origin_country="USA"
+        )
+        category = Category.objects.create(name="misc")
+        self.hot = Condition.objects.create(name="hot")
+        Condition.objects.create(name="any")
+        self.passport = Item.objects.create(
+            name="passport", suggested=True, category=category, condition=self.hot
+        )
+        self.packing_list.items.create(
+            item_name=self.passport, quantity=1, owner=self.user
+        )
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def get(self, path, token=None):
+        # the async test client turns extra arguments into request headers
+        token = self.token if token is None else token
+        headers = {"authorization": f"Bearer {token}"} if token else {}
+        return AsyncClient().get(path, **headers)
+
+    async def test_packing_list_matches_the_sync_view(self):
+        # ARRANGE
+        path = f"packing_lists/{self.packing_list.id}/?include=items"
+
+        # ACT
+        response = await self.get(f"/api/async/{path}")
+        sync_response = await self.get(f"/api/{path}")
+
+        # ASSERT
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, sync_response.content)
+        self.assertEqual(response["ETag"], sync_response["ETag"])
+
+    async def test_packing_lists_and_items(self):
+        # ACT
+        lists = await self.get("/api/async/packing_lists/")
+        items = await self.get(
+            f"/api/async/packing_lists/{self.packing_list.id}/items/"
+        )
+
+        # ASSERT
+        self.assertEqual(
+            [row["title"] for row in json.loads(lists.content)["packing_lists"]],
+            ["Berlin"],
+        )
+        self.assertEqual(
+            json.loads(items.content)["items"][0]["item_name"]["name"], "passport"
+        )
+
+    async def test_conditional_items_allow_anonymous_users(self):
+        # ACT
+        response = await self.get("/api/async/items/conditions/hot/", token="")
+
+        # ASSERT
+        content = json.loads(response.content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(content["conditional_items"][0]["name"], "passport")
+        self.assertEqual(content["user_favorite_items"], [])
+
+    async def test_packing_lists_require_a_valid_token(self):
+        # ACT
+        missing = await self.get("/api/async/packing_lists/", token="")
+        invalid = await self.get("/api/async/packing_lists/", token="nonsense")
+
+        # ASSERT
+        self.assertEqual(missing.status_code, 401)
+        self.assertEqual(invalid.status_code, 401)
+        self.assertIn("WWW-Authenticate", invalid)
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+from unittest import skipUnless
+from ..models import PackingList, User
+
+
+# the authentication class is read when the views are defined, so it cannot
+# be overridden per test
+@skipUnless(settings.JWT_AUTH_MODE == "claims", "needs JWT_AUTH_MODE=claims")
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="traveler", email="traveler@example.com", password="password"
+        )
+        PackingList.objects.create(title="Berlin", owner=self.user)
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+
+    def test_user_is_not_loaded_on_every_request(self):
+        # ARRANGE
+        self.client.get("/api/packing_lists/upcoming/")
+
+        # ACT
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/packing_lists/")
+
+        # ASSERT
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in queries if "packed_api_user" in q["sql"]])
+
+    def test_deactivated_user_is_rejected_on_the_next_request(self):
+        # ARRANGE
+        self.client.get("/api/packing_lists/")
+
+        # ACT
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get("/api/packing_lists/")
+
+        # ASSERT
+        self.assertEqual(response.status_code, 401)
+
+    def test_deleted_user_is_rejected(self):
+        # ARRANGE
+        self.client.get("/api/packing_lists/")
+
+        # ACT
+        self.user.delete()
+        response = self.client.get("/api/packing_lists/")
+
+        # ASSERT
+        self.assertEqual(response.status_code, 401)
+
+    def test_lists_are_created_for_the_token_user(self):
+        # ACT
+        response = self.client.post(
+            "/api/packing_lists/",
+            {
+                "title": "Lisbon",
+                "departure_date": "",
+                "return_date": "",
+                "destination_city": "Lisbon",
+                "destination_country": "Portugal",
+                "origin_country": "USA",
+            },
+            content_type="application/json",
+        )
+
+        # ASSERT
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.user.packing_lists.count(), 2)
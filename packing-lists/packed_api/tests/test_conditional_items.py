@@ -0,0 +1,224 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+import json
+from ..models import (
+    Category,
+    Condition,
+    Item,
+    PackingList,
+    PackingListItem,
+    User,
+)
+from ..registry import get_catalog_version
+
+
+class ConditionalItemsTests(TestCase):
+    def setUp(self):
+        # the rows below are never committed, so they do not bump the
+        # catalog version, and suggestions cached by other tests are dropped
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="traveler", email="traveler@example.com", password="password"
+        )
+        self.category = Category.objects.create(name="user")
+        self.hot = Condition.objects.create(name="hot")
+        self.any = Condition.objects.create(name="any")
+        self.user_condition = Condition.objects.create(name="user")
+        self.sunscreen = Item.objects.create(
+            name="sunscreen",
+            suggested=True,
+            category=self.category,
+            condition=self.hot,
+        )
+        self.passport = Item.objects.create(
+            name="passport",
+            suggested=True,
+            category=self.category,
+            condition=self.any,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def pack(self, *names, lists=1):
+        for _ in range(lists):
+            packing_list = PackingList.objects.create(
+                title="Trip", owner=self.user, origin_country="USA"
+            )
+            for name in names:
+                item, _ = Item.objects.get_or_create(
+                    name=name,
+                    defaults={
+                        "suggested": False,
+                        "category": self.category,
+                        "condition": self.user_condition,
+                    },
+                )
+                PackingListItem.objects.create(
+                    item_name=item,
+                    quantity=1,
+                    packing_list=packing_list,
+                    owner=self.user,
+                )
+
+    def get_favorites(self):
+        response = self.client.get("/api/items/conditions/hot/")
+        content = json.loads(response.content)
+        return [item["name"] for item in content["user_favorite_items"]]
+
+    def test_favorites_are_ordered_by_use_and_skip_suggested_items(self):
+        # ARRANGE
+        self.pack("camera", "sunscreen", "passport")
+        self.pack("socks", "camera", lists=2)
+
+        # ACT
+        favorites = self.get_favorites()
+
+        # ASSERT
+        self.assertEqual(favorites, ["camera", "socks"])
+
+    @override_settings(USER_FAVORITE_ITEMS_LIMIT=2)
+    def test_favorites_use_a_constant_number_of_queries(self):
+        # ARRANGE
+        self.pack("camera")
+        # otherwise the first request also loads the Condition registry
+        # and the catalog
+        self.get_favorites()
+        with CaptureQueriesContext(connection) as short_history:
+            self.get_favorites()
+        self.pack(*[f"item {i}" for i in range(30)], lists=3)
+
+        # ACT
+        with CaptureQueriesContext(connection) as long_history:
+            favorites = self.get_favorites()
+
+        # ASSERT
+        self.assertEqual(len(short_history), len(long_history))
+        self.assertEqual(len(favorites), 2)
+
+    def test_catalog_is_cached_until_an_item_changes(self):
+        # ARRANGE
+        self.get_favorites()
+
+        # ACT
+        with CaptureQueriesContext(connection) as cached:
+            response = self.client.get("/api/items/conditions/hot/")
+        cached_queries = len(cached)
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.create(
+                name="hat", suggested=True, category=self.category, condition=self.hot
+            )
+        refreshed = self.client.get("/api/items/conditions/hot/")
+
+        # ASSERT
+        self.assertEqual(cached_queries, 1)
+        self.assertEqual(
+            [
+                item["name"]
+                for item in json.loads(response.content)["conditional_items"]
+            ],
+            ["sunscreen"],
+        )
+        self.assertEqual(
+            [
+                item["name"]
+                for item in json.loads(refreshed.content)["conditional_items"]
+            ],
+            ["sunscreen", "hat"],
+        )
+        self.assertNotEqual(response["ETag"], refreshed["ETag"])
+
+    def test_user_items_keep_the_catalog(self):
+        # ARRANGE
+        self.get_favorites()
+        version = get_catalog_version()
+
+        # ACT
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pack("camera")
+            Item.objects.create(
+                name="hat",
+                suggested=False,
+                category=self.category,
+                condition=self.user_condition,
+            )
+        user_item_version = get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(
+                f"/api/items/{self.sunscreen.id}/",
+                json.dumps({"condition": self.user_condition.id}),
+                content_type="application/json",
+            )
+
+        # ASSERT
+        self.assertEqual(user_item_version, version)
+        self.assertNotEqual(get_catalog_version(), version)
+        self.assertEqual(
+            json.loads(self.client.get("/api/items/conditions/hot/").content)[
+                "conditional_items"
+            ],
+            [],
+        )
+
+    def test_catalog_is_invalidated_once_the_change_commits(self):
+        # ARRANGE
+        version = get_catalog_version()
+
+        # ACT
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.create(
+                name="hat", suggested=True, category=self.category, condition=self.hot
+            )
+            # a request served before the commit caches the old rows
+            # under the old version
+            before_commit = get_catalog_version()
+
+        # ASSERT
+        self.assertEqual(before_commit, version)
+        self.assertNotEqual(get_catalog_version(), version)
+
+    def test_matching_etag_returns_not_modified(self):
+        # ARRANGE
+        etag = self.client.get("/api/items/conditions/hot/")["ETag"]
+
+        # ACT
+        response = self.client.get(
+            "/api/items/conditions/hot/", HTTP_IF_NONE_MATCH=etag
+        )
+
+        # ASSERT
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_several_conditions_return_the_union_of_their_items(self):
+        # ARRANGE
+        with self.captureOnCommitCallbacks(execute=True):
+            moderate = Condition.objects.create(name="moderate")
+        for name in ["Sunscreen", "umbrella"]:
+            Item.objects.create(
+                name=name, suggested=True, category=self.category, condition=moderate
+            )
+
+        # ACT
+        response = self.client.get("/api/items/conditions/moderate,hot/")
+        reordered = self.client.get("/api/items/conditions/hot, moderate/")
+
+        # ASSERT
+        content = json.loads(response.content)
+        self.assertEqual(
+            [item["name"] for item in content["conditional_items"]],
+            ["sunscreen", "umbrella"],
+        )
+        self.assertEqual(
+            [item["name"] for item in content["general_items"]], ["passport"]
+        )
+        self.assertEqual(response["ETag"], reordered["ETag"])
+
+    def test_unknown_condition_in_a_list_is_rejected(self):
+        # ACT
+        response = self.client.get("/api/items/conditions/hot,arctic/")
+
+        # ASSERT
+        self.assertEqual(response.status_code, 400)
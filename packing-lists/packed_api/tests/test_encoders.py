@@ -0,0 +1,171 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+from unittest import skipUnless
+from datetime import date
+import json
+from common.json import orjson
+from ..encoders import ItemEncoder, PackingListEncoder, PackingListItemEncoder
+from ..models import Category, Condition, Item, PackingList, PackingListItem
+
+
+# the expected strings come from the json module, which only the 'stdlib'
+# backend matches byte for byte
+@override_settings(JSON_BACKEND="stdlib")
+class ModelEncoderTests(SimpleTestCase):
+    def setUp(self):
+        self.item = Item(
+            id=3,
+            name="coat",
+            suggested=True,
+            category=Category(id=1, name="clothing"),
+            condition=Condition(id=2, name="cold"),
+        )
+
+    def test_encodes_nested_properties_like_the_json_module(self):
+        # ARRANGE
+        expected = json.dumps(
+            {
+                "items": [
+                    {
+                        "id": 3,
+                        "name": "coat",
+                        "category": {"id": 1, "name": "clothing"},
+                        "condition": {"id": 2, "name": "cold"},
+                        "suggested": True,
+                    }
+                ]
+            }
+        )
+
+        # ACT
+        result = json.dumps({"items": [self.item]}, cls=ItemEncoder)
+
+        # ASSERT
+        self.assertEqual(result, expected)
+
+    def test_encodes_dates_and_simple_nested_items(self):
+        # ARRANGE
+        packing_list = PackingList(id=7, title="Oslo", created=date(2022, 8, 5))
+        packing_list_item = PackingListItem(
+            id=4, item_name=self.item, quantity=2, packed=False
+        )
+
+        # ACT
+        encoded_list = json.loads(json.dumps(packing_list, cls=PackingListEncoder))
+        encoded_item = json.loads(
+            json.dumps(packing_list_item, cls=PackingListItemEncoder)
+        )
+
+        # ASSERT
+        self.assertEqual(encoded_list["created"], "2022-08-05")
+        self.assertEqual(
+            encoded_item,
+            {
+                "id": 4,
+                "item_name": {"id": 3, "name": "coat", "suggested": True},
+                "quantity": 2,
+                "packed": False,
+            },
+        )
+
+    @skipUnless(orjson, "needs orjson")
+    def test_orjson_backend_writes_the_same_data(self):
+        # ARRANGE
+        expected = json.loads(json.dumps({"items": [self.item]}, cls=ItemEncoder))
+
+        # ACT
+        with self.settings(JSON_BACKEND="orjson"):
+            result = json.dumps({"items": [self.item]}, cls=ItemEncoder)
+
+        # ASSERT
+        self.assertNotEqual(result, json.dumps(expected))
+        self.assertEqual(json.loads(result), expected)
+
+    @skipUnless(orjson, "needs orjson")
+    def test_backends_differ_only_in_formatting_on_non_ascii_data(self):
+        # ARRANGE
+        self.item.name = "Mütze für Zürich ☃"
+        stdlib = json.dumps({"items": [self.item]}, cls=ItemEncoder)
+
+        # ACT
+        with self.settings(JSON_BACKEND="orjson"):
+            fast = json.dumps({"items": [self.item]}, cls=ItemEncoder)
+
+        # ASSERT
+        self.assertIn("M\\u00fctze", stdlib)
+        self.assertTrue(stdlib.isascii())
+        self.assertIn("Mütze für Zürich ☃", fast)
+        self.assertNotEqual(fast, stdlib)
+        self.assertEqual(json.loads(fast), json.loads(stdlib))
+
+
+class QueryPlanTests(TestCase):
+    def test_plan_follows_nested_encoders(self):
+        # ARRANGE
+        expected_related = ["category", "condition"]
+
+        # ACT
+        related, only = ItemEncoder.select_related, ItemEncoder.only_fields
+
+        # ASSERT
+        self.assertEqual(related, expected_related)
+        self.assertIn("category__name", only)
+        self.assertIn("condition__id", only)
+
+    def test_items_list_is_encoded_with_one_query(self):
+        # ARRANGE
+        for index in range(10):
+            Item.objects.create(
+                name=f"item {index}",
+                suggested=True,
+                category=Category.objects.create(name=f"category {index}"),
+                condition=Condition.objects.create(name=f"condition {index}"),
+            )
+
+        # ACT
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/items")
+
+        # ASSERT
+        self.assertEqual(len(json.loads(response.content)["items"]), 10)
+
+
+class StreamingTests(TestCase):
+    def create_items(self):
+        category = Category.objects.create(name="misc")
+        condition = Condition.objects.create(name="any")
+        for index in range(5):
+            Item.objects.create(
+                name=f"item {index}",
+                suggested=True,
+                category=category,
+                condition=condition,
+            )
+
+    def test_streamed_items_match_the_regular_response(self):
+        # ARRANGE
+        self.create_items()
+
+        # ACT
+        with self.settings(STREAMING_CHUNK_SIZE=2):
+            streamed = self.client.get("/api/items?stream=true")
+            content = b"".join(streamed.streaming_content)
+        regular = self.client.get("/api/items")
+
+        # ASSERT
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(content, regular.content)
+
+    @skipUnless(orjson, "needs orjson")
+    def test_streamed_items_use_the_separators_of_the_backend(self):
+        # ARRANGE
+        self.create_items()
+
+        # ACT
+        with self.settings(STREAMING_CHUNK_SIZE=2, JSON_BACKEND="orjson"):
+            streamed = self.client.get("/api/items?stream=true")
+            content = b"".join(streamed.streaming_content)
+            regular = self.client.get("/api/items")
+
+        # ASSERT
+        self.assertEqual(content, regular.content)
+        self.assertNotIn(b", ", content)
@@ -0,0 +1,280 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+import json
+from ..models import (
+    Category,
+    Condition,
+    Item,
+    PackingList,
+    PackingListItem,
+    User,
+)
+
+
+class PackingListItemsTests(TestCase):
+    def setUp(self):
+        # the rows below are never committed, so they do not bump the
+        # reference version, and registries loaded by other tests are dropped
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="traveler", email="traveler@example.com", password="password"
+        )
+        self.category = Category.objects.create(name="user")
+        self.condition = Condition.objects.create(name="user")
+        self.passport = Item.objects.create(name="passport", suggested=True)
+        self.packing_list = PackingList.objects.create(
+            title="Berlin", owner=self.user, origin_country="USA"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = f"/api/packing_lists/{self.packing_list.id}/items/"
+
+    def post_items(self, items):
+        return self.client.post(
+            self.url, json.dumps({"items": items}), content_type="application/json"
+        )
+
+    def test_post_links_existing_and_creates_missing_items(self):
+        # ARRANGE
+        items = [
+            {"name": "passport", "quantity": 1, "suggested": True},
+            {"name": "camera", "quantity": "2", "suggested": False},
+            {"name": "camera", "quantity": 1, "suggested": False, "packed": True},
+        ]
+
+        # ACT
+        response = self.post_items(items)
+
+        # ASSERT
+        content = json.loads(response.content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["item_name"]["name"] for item in content["items"]],
+            ["passport", "camera", "camera"],
+        )
+        self.assertEqual([item["quantity"] for item in content["items"]], [1, 2, 1])
+        self.assertEqual(Item.objects.filter(name="camera").count(), 1)
+        camera = Item.objects.get(name="camera")
+        self.assertEqual(camera.category, self.category)
+        self.assertEqual(camera.condition, self.condition)
+        self.assertEqual(PackingListItem.objects.filter(owner=self.user).count(), 3)
+
+    def test_post_query_count_does_not_grow_with_items(self):
+        # ARRANGE
+        few = [
+            {"name": f"few {i}", "quantity": 1, "suggested": False} for i in range(2)
+        ]
+        many = [
+            {"name": f"many {i}", "quantity": 1, "suggested": False} for i in range(40)
+        ]
+        # the first request also loads the Category and Condition registries
+        self.post_items([{"name": "warm up", "quantity": 1, "suggested": False}])
+
+        # ACT
+        with CaptureQueriesContext(connection) as few_queries:
+            self.post_items(few)
+        with CaptureQueriesContext(connection) as many_queries:
+            self.post_items(many)
+
+        # ASSERT
+        self.assertEqual(len(few_queries), len(many_queries))
+        self.assertEqual(PackingListItem.objects.count(), 43)
+
+    def test_put_applies_only_the_changed_rows(self):
+        # ARRANGE
+        self.post_items(
+            [
+                {"name": "passport", "quantity": 1, "suggested": True},
+                {"name": "camera", "quantity": 1, "suggested": False},
+                {"name": "socks", "quantity": 4, "suggested": False},
+            ]
+        )
+        stored = json.loads(self.client.get(self.url).content)["items"]
+        passport, camera, socks = stored
+        items = [
+            {"id": passport["id"], "name": "passport", "quantity": 1, "packed": True},
+            {"id": camera["id"], "name": "camera", "quantity": 1},
+            {"name": "charger", "quantity": 1, "suggested": False},
+        ]
+
+        # ACT
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(
+                self.url,
+                json.dumps({"items": items}),
+                content_type="application/json",
+            )
+
+        # ASSERT
+        content = json.loads(response.content)
+        self.assertEqual(
+            [item["item_name"]["name"] for item in content["items"]],
+            ["passport", "camera", "charger"],
+        )
+        self.assertEqual(content["items"][0]["id"], passport["id"])
+        self.assertTrue(content["items"][0]["packed"])
+        self.assertEqual(content["items"][1]["id"], camera["id"])
+        self.assertFalse(PackingListItem.objects.filter(id=socks["id"]).exists())
+        updates = [
+            q
+            for q in queries
+            if q["sql"].startswith('UPDATE "packed_api_packinglistitem"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn(f"IN ({passport['id']})", updates[0]["sql"])
+        touches = [
+            q for q in queries if q["sql"].startswith('UPDATE "packed_api_packinglist"')
+        ]
+        self.assertEqual(len(touches), 1)
+
+    def test_patch_updates_one_item(self):
+        # ARRANGE
+        self.post_items([{"name": "passport", "quantity": 1, "suggested": True}])
+        row = PackingListItem.objects.get()
+
+        # ACT
+        response = self.client.patch(
+            f"/api/packing_list_items/{row.id}/",
+            json.dumps({"packed": True}),
+            content_type="application/json",
+        )
+
+        # ASSERT
+        content = json.loads(response.content)
+        self.assertTrue(content["packed"])
+        self.assertEqual(content["quantity"], 1)
+        row.refresh_from_db()
+        self.assertTrue(row.packed)
+
+    def test_patch_rejects_items_of_other_users(self):
+        # ARRANGE
+        self.post_items([{"name": "passport", "quantity": 1, "suggested": True}])
+        row = PackingListItem.objects.get()
+        stranger = User.objects.create_user(
+            username="stranger", email="stranger@example.com", password="password"
+        )
+        self.client.force_authenticate(user=stranger)
+
+        # ACT
+        response = self.client.patch(
+            f"/api/packing_list_items/{row.id}/",
+            json.dumps({"packed": True}),
+            content_type="application/json",
+        )
+
+        # ASSERT
+        self.assertEqual(response.status_code, 400)
+        row.refresh_from_db()
+        self.assertFalse(row.packed)
+
+    def test_bulk_patch_groups_updates_by_changed_columns(self):
+        # ARRANGE
+        self.post_items(
+            [{"name": f"item {i}", "quantity": 1, "suggested": False} for i in range(6)]
+        )
+        rows = list(PackingListItem.objects.order_by("id"))
+        changes = [{"id": row.id, "packed": True} for row in rows[:5]]
+        changes.append({"id": rows[5].id, "quantity": 3})
+
+        # ACT
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                self.url,
+                json.dumps({"items": changes}),
+                content_type="application/json",
+            )
+
+        # ASSERT
+        content = json.loads(response.content)
+        self.assertEqual(
+            [item["id"] for item in content["items"]], [r.id for r in rows]
+        )
+        self.assertEqual(PackingListItem.objects.filter(packed=True).count(), 5)
+        self.assertEqual(PackingListItem.objects.get(id=rows[5].id).quantity, 3)
+        updates = [
+            q
+            for q in queries
+            if q["sql"].startswith('UPDATE "packed_api_packinglistitem"')
+        ]
+        self.assertEqual(len(updates), 2)
+
+    def test_bulk_patch_sets_distinct_values_in_one_update(self):
+        # ARRANGE
+        self.post_items(
+            [
+                {"name": f"item {i}", "quantity": 1, "suggested": False}
+                for i in range(10)
+            ]
+        )
+        rows = list(PackingListItem.objects.order_by("id"))
+        changes = [
+            {"id": row.id, "quantity": index + 2, "packed": index % 2 == 0}
+            for index, row in enumerate(rows)
+        ]
+
+        # ACT
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                self.url,
+                json.dumps({"items": changes}),
+                content_type="application/json",
+            )
+
+        # ASSERT
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(
+                PackingListItem.objects.order_by("id").values_list("quantity", "packed")
+            ),
+            [(index + 2, index % 2 == 0) for index in range(10)],
+        )
+        updates = [
+            q
+            for q in queries
+            if q["sql"].startswith('UPDATE "packed_api_packinglistitem"')
+        ]
+        self.assertEqual(len(updates), 1)
+
+    def test_bulk_patch_rejects_invalid_changes(self):
+        # ACT
+        response = self.client.patch(
+            self.url,
+            json.dumps({"items": [{"id": 1, "quantity": "lots"}]}),
+            content_type="application/json",
+        )
+
+        # ASSERT
+        self.assertEqual(response.status_code, 400)
+
+    def test_patch_rejects_malformed_bodies_with_a_message(self):
+        # ARRANGE
+        bodies = {
+            self.url: [
+                ("{not json", "The request body is not valid JSON"),
+                ("[]", "'items' must be a list of changes"),
+                ('{"items": [1]}', "Each change must be an object"),
+                (
+                    '{"items": [{"packed": true}]}',
+                    "Each change needs the integer 'id' of an item",
+                ),
+            ],
+            "/api/packing_list_items/1/": [
+                ("{not json", "The request body is not valid JSON"),
+                ('{"quantity": -1}', "'quantity' must be a positive integer"),
+            ],
+        }
+
+        # ACT
+        responses = [
+            (self.client.patch(url, body, content_type="application/json"), message)
+            for url, cases in bodies.items()
+            for body, message in cases
+        ]
+
+        # ASSERT
+        for response, message in responses:
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(json.loads(response.content), {"message": message})
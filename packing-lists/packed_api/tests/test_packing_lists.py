@@ -0,0 +1,374 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from datetime import date, timedelta
+import json
+import time
+from ..models import Category, Condition, Item, PackingList, PackingListItem, User
+
+
+class PackingListTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="traveler", email="traveler@example.com", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_trip(self, title, departs_in, days):
+        departure_date = date.today() + timedelta(days=departs_in)
+        return PackingList.objects.create(
+            title=title,
+            owner=self.user,
+            departure_date=departure_date,
+            return_date=departure_date + timedelta(days=days),
+        )
+
+    def test_create_stores_trip_dates_as_dates(self):
+        # ARRANGE
+        content = {
+            "title": "Berlin",
+            "departure_date": "2023-01-05",
+            "return_date": "",
+            "destination_city": "Berlin",
+            "destination_country": "Germany",
+            "origin_country": "USA",
+        }
+
+        # ACT
+        response = self.client.post(
+            "/api/packing_lists/", json.dumps(content), content_type="application/json"
+        )
+
+        # ASSERT
+        packing_list = PackingList.objects.get()
+        self.assertEqual(json.loads(response.content)["departure_date"], "2023-01-05")
+        self.assertEqual(packing_list.departure_date, date(2023, 1, 5))
+        self.assertIsNone(packing_list.return_date)
+
+    def test_create_rejects_invalid_trip_dates(self):
+        # ARRANGE
+        content = {
+            "title": "Berlin",
+            "departure_date": "next week",
+            "return_date": "",
+            "destination_city": "Berlin",
+            "destination_country": "Germany",
+            "origin_country": "USA",
+        }
+
+        # ACT
+        response = self.client.post(
+            "/api/packing_lists/", json.dumps(content), content_type="application/json"
+        )
+
+        # ASSERT
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PackingList.objects.exists())
+
+    def test_upcoming_lists_in_progress_and_future_trips(self):
+        # ARRANGE
+        self.create_trip("over", departs_in=-20, days=5)
+        self.create_trip("later", departs_in=30, days=5)
+        self.create_trip("in progress", departs_in=-2, days=5)
+        self.create_trip("soon", departs_in=3, days=5)
+
+        # ACT
+        response = self.client.get("/api/packing_lists/upcoming/")
+
+        # ASSERT
+        titles = [
+            packing_list["title"]
+            for packing_list in json.loads(response.content)["packing_lists"]
+        ]
+        self.assertEqual(titles, ["in progress", "soon", "later"])
+
+    def test_detail_is_not_modified_until_its_items_change(self):
+        # ARRANGE
+        packing_list = self.create_trip("Berlin", departs_in=3, days=5)
+        Item.objects.create(name="passport", suggested=True)
+        url = f"/api/packing_lists/{packing_list.id}/"
+        etag = self.client.get(url)["ETag"]
+
+        # ACT
+        unchanged = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.client.post(
+            f"{url}items/",
+            json.dumps({"items": [{"name": "passport", "quantity": 1}]}),
+            content_type="application/json",
+        )
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        # ASSERT
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+    def pack_item(self, packing_list, name):
+        item = Item.objects.create(
+            name=name,
+            suggested=True,
+            category=Category.objects.get_or_create(name="essentials")[0],
+            condition=Condition.objects.get_or_create(name="any")[0],
+        )
+        PackingListItem.objects.create(
+            item_name=item, quantity=1, packing_list=packing_list, owner=self.user
+        )
+        return item
+
+    def test_items_are_modified_when_their_item_is_deleted(self):
+        # ARRANGE
+        packing_list = self.create_trip("Berlin", departs_in=3, days=5)
+        item = self.pack_item(packing_list, "passport")
+        url = f"/api/packing_lists/{packing_list.id}/items/"
+        etag = self.client.get(url)["ETag"]
+
+        # ACT
+        item.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        # ASSERT
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["items"], [])
+
+    def test_items_are_modified_when_their_item_is_renamed(self):
+        # ARRANGE
+        packing_list = self.create_trip("Berlin", departs_in=3, days=5)
+        item = self.pack_item(packing_list, "passport")
+        url = f"/api/packing_lists/{packing_list.id}/items/"
+        etag = self.client.get(url)["ETag"]
+
+        # ACT
+        self.client.put(
+            f"/api/items/{item.id}/",
+            json.dumps({"name": "visa"}),
+            content_type="application/json",
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        # ASSERT
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row["item_name"]["name"] for row in json.loads(response.content)["items"]],
+            ["visa"],
+        )
+
+    def test_items_not_modified_without_reading_the_items(self):
+        # ARRANGE
+        packing_list = self.create_trip("Berlin", departs_in=3, days=5)
+        url = f"/api/packing_lists/{packing_list.id}/items/"
+        etag = self.client.get(url)["ETag"]
+
+        # ACT
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        # ASSERT
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(
+            [q for q in queries if "packed_api_packinglistitem" in q["sql"]]
+        )
+
+    def test_lists_are_not_modified_until_a_list_is_added(self):
+        # ARRANGE
+        self.create_trip("Berlin", departs_in=3, days=5)
+        etag = self.client.get("/api/packing_lists/")["ETag"]
+
+        # ACT
+        unchanged = self.client.get("/api/packing_lists/", HTTP_IF_NONE_MATCH=etag)
+        self.create_trip("Lisbon", departs_in=10, days=5)
+        changed = self.client.get("/api/packing_lists/", HTTP_IF_NONE_MATCH=etag)
+
+        # ASSERT
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(changed.status_code, 200)
+
+    def test_lists_ignore_if_modified_since(self):
+        # ARRANGE
+        self.create_trip("Berlin", departs_in=3, days=5)
+        lisbon = self.create_trip("Lisbon", departs_in=10, days=5)
+        response = self.client.get("/api/packing_lists/")
+        lisbon.delete()
+
+        # ACT
+        # deleting a list does not move the latest update time
+        changed = self.client.get(
+            "/api/packing_lists/", HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+
+        # ASSERT
+        self.assertNotIn("Last-Modified", response)
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(
+            [row["title"] for row in json.loads(changed.content)["packing_lists"]],
+            ["Berlin"],
+        )
+
+    def test_put_rejects_fields_set_by_the_server(self):
+        # ARRANGE
+        packing_list = self.create_trip("Berlin", departs_in=3, days=5)
+        url = f"/api/packing_lists/{packing_list.id}/"
+
+        # ACT
+        responses = [
+            self.client.put(url, json.dumps(content), content_type="application/json")
+            for content in [
+                {"title": "Lisbon", "updated_at": "2022-01-01T00:00:00Z"},
+                {"id": 99},
+                {"owner": 99},
+                {"colour": "blue"},
+            ]
+        ]
+
+        # ASSERT
+        self.assertEqual([response.status_code for response in responses], [400] * 4)
+        self.assertEqual(
+            json.loads(responses[0].content)["message"], "Cannot update updated_at"
+        )
+        self.assertEqual(PackingList.objects.get().title, "Berlin")
+
+    def test_put_only_updates_the_requested_list(self):
+        # ARRANGE
+        berlin = self.create_trip("Berlin", departs_in=3, days=5)
+        lisbon = self.create_trip("Lisbon", departs_in=10, days=5)
+
+        # ACT
+        response = self.client.put(
+            f"/api/packing_lists/{berlin.id}/",
+            json.dumps({"completed": True}),
+            content_type="application/json",
+        )
+
+        # ASSERT
+        self.assertTrue(json.loads(response.content)["completed"])
+        lisbon.refresh_from_db()
+        self.assertFalse(lisbon.completed)
+
+    def test_put_rejects_invalid_trip_dates(self):
+        # ARRANGE
+        berlin = self.create_trip("Berlin", departs_in=3, days=5)
+        url = f"/api/packing_lists/{berlin.id}/"
+        departure = date.today() + timedelta(days=3)
+        invalid = [
+            {"departure_date": "next week"},
+            {"return_date": 20230105},
+            {"return_date": (departure - timedelta(days=1)).isoformat()},
+            {"return_date": (departure + timedelta(days=400)).isoformat()},
+        ]
+
+        # ACT
+        responses = [
+            self.client.put(url, json.dumps(content), content_type="application/json")
+            for content in invalid
+        ]
+        cleared = self.client.put(
+            url, json.dumps({"return_date": ""}), content_type="application/json"
+        )
+
+        # ASSERT
+        self.assertEqual([response.status_code for response in responses], [400] * 4)
+        self.assertEqual(cleared.status_code, 200)
+        berlin.refresh_from_db()
+        self.assertEqual(berlin.departure_date, departure)
+        self.assertIsNone(berlin.return_date)
+
+    def test_create_rejects_a_return_before_the_departure(self):
+        # ARRANGE
+        content = {
+            "title": "Berlin",
+            "departure_date": "2023-01-05",
+            "return_date": "2023-01-01",
+            "destination_city": "Berlin",
+            "destination_country": "Germany",
+            "origin_country": "USA",
+        }
+
+        # ACT
+        response = self.client.post(
+            "/api/packing_lists/", json.dumps(content), content_type="application/json"
+        )
+
+        # ASSERT
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PackingList.objects.exists())
+
+    def test_detail_includes_items_with_one_prefetch(self):
+        # ARRANGE
+        packing_list = self.create_trip("Berlin", departs_in=3, days=5)
+        for name in ["passport", "charger", "socks"]:
+            packing_list.items.create(
+                item_name=Item.objects.create(name=name, suggested=True),
+                quantity=1,
+                owner=self.user,
+            )
+
+        # ACT
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                f"/api/packing_lists/{packing_list.id}/?include=items"
+            )
+
+        # ASSERT
+        content = json.loads(response.content)
+        self.assertEqual(content["title"], "Berlin")
+        self.assertEqual(
+            sorted(item["item_name"]["name"] for item in content["items"]),
+            ["charger", "passport", "socks"],
+        )
+        self.assertEqual(len(queries), 2)
+
+    def test_batch_returns_only_owned_lists_with_items(self):
+        # ARRANGE
+        stranger = User.objects.create_user(
+            username="stranger", email="stranger@example.com", password="password"
+        )
+        berlin = self.create_trip("Berlin", departs_in=3, days=5)
+        lisbon = self.create_trip("Lisbon", departs_in=10, days=5)
+        hidden = PackingList.objects.create(title="Hidden", owner=stranger)
+        passport = Item.objects.create(name="passport", suggested=True)
+        for packing_list in (berlin, lisbon):
+            packing_list.items.create(item_name=passport, quantity=1, owner=self.user)
+
+        # ACT
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                f"/api/packing_lists/batch/?ids={lisbon.id},{hidden.id},{berlin.id}"
+            )
+
+        # ASSERT
+        packing_lists = json.loads(response.content)["packing_lists"]
+        self.assertEqual(
+            [packing_list["title"] for packing_list in packing_lists],
+            ["Lisbon", "Berlin"],
+        )
+        self.assertEqual(packing_lists[0]["items"][0]["item_name"]["name"], "passport")
+        self.assertEqual(len(queries), 2)
+
+    def test_batch_without_ids_pages_through_all_lists(self):
+        # ARRANGE
+        for index in range(3):
+            self.create_trip(f"Trip {index}", departs_in=index, days=5)
+
+        # ACT
+        with self.settings(PACKING_LIST_BATCH_MAX=2):
+            first = json.loads(self.client.get("/api/packing_lists/batch/").content)
+            second = json.loads(
+                self.client.get(
+                    f"/api/packing_lists/batch/?after={first['next']}"
+                ).content
+            )
+
+        # ASSERT
+        self.assertEqual(len(first["packing_lists"]), 2)
+        self.assertEqual(len(second["packing_lists"]), 1)
+        self.assertIsNone(second["next"])
+
+    def test_batch_rejects_too_many_ids(self):
+        # ACT
+        with self.settings(PACKING_LIST_BATCH_MAX=2):
+            response = self.client.get("/api/packing_lists/batch/?ids=1,2,3")
+
+        # ASSERT
+        self.assertEqual(response.status_code, 400)
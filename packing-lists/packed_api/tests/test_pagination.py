@@ -0,0 +1,88 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+import json
+from ..models import Category, Condition, Item, PackingList, User
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="misc")
+        self.condition = Condition.objects.create(name="any")
+        self.items = [
+            Item.objects.create(
+                name=f"item {index}",
+                suggested=True,
+                category=self.category,
+                condition=self.condition,
+            )
+            for index in range(5)
+        ]
+
+    def get_page(self, url):
+        response = self.client.get(url)
+        return response.status_code, json.loads(response.content)
+
+    def test_without_parameters_everything_is_returned(self):
+        # ACT
+        _, content = self.get_page("/api/items")
+
+        # ASSERT
+        self.assertEqual(len(content["items"]), 5)
+        self.assertNotIn("next", content)
+
+    def test_pages_follow_the_cursor_and_ignore_new_rows(self):
+        # ARRANGE
+        _, first_page = self.get_page("/api/items?limit=2")
+        Item.objects.create(
+            name="late item",
+            suggested=True,
+            category=self.category,
+            condition=self.condition,
+        )
+
+        # ACT
+        _, second_page = self.get_page(f"/api/items?limit=2&after={first_page['next']}")
+        _, third_page = self.get_page(f"/api/items?limit=2&after={second_page['next']}")
+
+        # ASSERT
+        names = [
+            item["name"]
+            for page in (first_page, second_page, third_page)
+            for item in page["items"]
+        ]
+        self.assertEqual(names[:5], [item.name for item in self.items])
+        self.assertEqual(len(third_page["items"]), 2)
+        self.assertIsNone(third_page["next"])
+
+    def test_invalid_cursor_is_rejected(self):
+        # ACT
+        status_code, content = self.get_page("/api/items?after=not-a-cursor")
+
+        # ASSERT
+        self.assertEqual(status_code, 400)
+        self.assertEqual(content, {"message": "Invalid cursor"})
+
+    def test_packing_lists_are_paged_by_created_date(self):
+        # ARRANGE
+        user = User.objects.create_user(
+            username="traveler", email="traveler@example.com", password="password"
+        )
+        for index in range(3):
+            PackingList.objects.create(title=f"Trip {index}", owner=user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        # ACT
+        first_page = json.loads(client.get("/api/packing_lists/?limit=2").content)
+        second_page = json.loads(
+            client.get(f"/api/packing_lists/?after={first_page['next']}").content
+        )
+
+        # ASSERT
+        titles = [
+            packing_list["title"]
+            for page in (first_page, second_page)
+            for packing_list in page["packing_lists"]
+        ]
+        self.assertEqual(titles, ["Trip 0", "Trip 1", "Trip 2"])
+        self.assertIsNone(second_page["next"])
@@ -0,0 +1,232 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+from unittest import mock, skipUnless
+from collections import namedtuple
+from datetime import date, timedelta
+import json
+import os
+import time
+from .. import async_urls, async_views, urls
+from ..models import (
+    Category,
+    Condition,
+    Item,
+    PackingList,
+    PackingListItem,
+    User,
+)
+
+# the machine-readable report of every measured request, compare it between
+# commits to follow query count and latency trends
+REPORT_PATH = os.environ.get(
+    "QUERY_BUDGET_REPORT", os.path.join(settings.BASE_DIR, "query-budgets.json")
+)
+
+CATALOG_ITEMS = 300
+PACKING_LISTS = 20
+ITEMS_PER_LIST = 30
+
+Case = namedtuple("Case", ["method", "kwargs", "body", "max_queries", "max_ms"])
+
+
+def list_items(count, packed=False):
+    items = [
+        {
+            "name": f"catalog item {index}",
+            "quantity": 1,
+            "packed": packed,
+            "suggested": True,
+        }
+        for index in range(count)
+    ]
+    items.append({"name": "brand new item", "quantity": 2, "suggested": False})
+    return {"items": items}
+
+
+# the budget for every url name in packed_api/urls.py and async_urls.py.
+# 'kwargs' may use the names 'list', 'list_item', 'item', 'category' and
+# 'condition', which are replaced with the id of a seeded row
+BUDGETS = {
+    "api_categories": [Case("get", {}, None, 2, 100)],
+    "api_category": [Case("get", {"pk": "category"}, None, 1, 100)],
+    "api_items": [Case("get", {}, None, 1, 300)],
+    "api_item": [Case("get", {"pk": "item"}, None, 3, 100)],
+    "api_conditional_items": [
+        Case("get", {"condition": "hot"}, None, 4, 300),
+        Case("get", {"condition": "hot,moderate,cold"}, None, 4, 300),
+    ],
+    "api_conditions": [Case("get", {}, None, 1, 100)],
+    "api_condition": [Case("get", {"pk": "condition"}, None, 1, 100)],
+    "api_packing_lists": [Case("get", {}, None, 2, 200)],
+    "api_upcoming_packing_lists": [Case("get", {}, None, 1, 200)],
+    "api_packing_lists_batch": [Case("get", {}, None, 2, 300)],
+    "api_packing_list": [Case("get", {"pk": "list"}, None, 1, 100)],
+    "api_packing_list_items": [
+        Case("get", {"pk": "list"}, None, 2, 200),
+        Case("post", {"pk": "list"}, list_items(ITEMS_PER_LIST), 7, 300),
+        Case("put", {"pk": "list"}, list_items(ITEMS_PER_LIST, packed=True), 10, 300),
+    ],
+    "api_packing_list_item": [
+        Case("patch", {"pk": "list_item"}, {"packed": True, "quantity": 2}, 5, 100)
+    ],
+    "async_api_conditional_items": [
+        Case("get", {"condition": "hot"}, None, 4, 300),
+        Case("get", {"condition": "hot,moderate,cold"}, None, 4, 300),
+    ],
+    "async_api_packing_lists": [Case("get", {}, None, 2, 200)],
+    "async_api_packing_list": [Case("get", {"pk": "list"}, None, 1, 100)],
+    "async_api_packing_list_items": [Case("get", {"pk": "list"}, None, 2, 200)],
+}
+
+
+def same_thread_queries():
+    """
+    The async views query from the event loop's thread pool, on a connection
+    that neither sees the rows of the test's transaction nor is captured by
+    CaptureQueriesContext. This runs their queries on the test's thread, the
+    queries themselves are the same
+
+    Returns: a context manager
+    """
+    return mock.patch.object(
+        async_views,
+        "database_sync_to_async",
+        lambda function: sync_to_async(function, thread_sensitive=True),
+    )
+
+
+# the authentication class is read when the views are defined, so it cannot
+# be overridden per test
+@skipUnless(settings.JWT_AUTH_MODE == "claims", "needs JWT_AUTH_MODE=claims")
+class QueryBudgetTests(TestCase):
+    """
+    Calls every endpoint against a realistic data set and fails when an
+    endpoint uses more queries or more time than its budget allows
+    """
+
+    report = []
+
+    @classmethod
+    def setUpTestData(cls):
+        # the rows below are never committed, so they do not bump the
+        # reference version, and registries loaded by other tests are dropped
+        cache.clear()
+        cls.user = User.objects.create_user(
+            username="traveler", email="traveler@example.com", password="password"
+        )
+        categories = {
+            name: Category.objects.create(name=name)
+            for name in ["clothing", "electronics", "essentials", "misc", "user"]
+        }
+        conditions = {
+            name: Condition.objects.create(name=name)
+            for name in ["hot", "moderate", "cold", "any", "user"]
+        }
+        condition_names = ["hot", "moderate", "cold", "any"]
+        Item.objects.bulk_create(
+            [
+                Item(
+                    name=f"catalog item {index}",
+                    suggested=True,
+                    category=categories["misc"],
+                    condition=conditions[condition_names[index % 4]],
+                )
+                for index in range(CATALOG_ITEMS)
+            ]
+        )
+        items = list(Item.objects.order_by("id"))
+        for list_index in range(PACKING_LISTS):
+            packing_list = PackingList.objects.create(
+                title=f"Trip {list_index}",
+                owner=cls.user,
+                departure_date=date.today() + timedelta(days=7 * list_index),
+                return_date=date.today() + timedelta(days=7 * list_index + 14),
+                destination_city="Berlin",
+                destination_country="Germany",
+                origin_country="USA",
+            )
+            PackingListItem.objects.bulk_create(
+                [
+                    PackingListItem(
+                        item_name=items[(list_index + index) % len(items)],
+                        quantity=1,
+                        packing_list=packing_list,
+                        owner=cls.user,
+                    )
+                    for index in range(ITEMS_PER_LIST)
+                ]
+            )
+        cls.ids = {
+            "list": packing_list.id,
+            "list_item": packing_list.items.order_by("id").first().id,
+            "item": items[0].id,
+            "category": categories["misc"].id,
+            "condition": conditions["hot"].id,
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with open(REPORT_PATH, "w") as report:
+            json.dump({"endpoints": cls.report}, report, indent=2)
+
+    def setUp(self):
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+
+    def measure(self, name, case):
+        kwargs = {key: self.ids.get(value, value) for key, value in case.kwargs.items()}
+        url = reverse(name, kwargs=kwargs)
+        request = getattr(self.client, case.method)
+        body = json.dumps(case.body) if case.body is not None else None
+        with same_thread_queries(), CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            if body is None:
+                response = request(url)
+            else:
+                response = request(url, body, content_type="application/json")
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        result = {
+            "name": name,
+            "method": case.method.upper(),
+            "url": url,
+            "status": response.status_code,
+            "queries": len(queries),
+            "max_queries": case.max_queries,
+            "ms": round(elapsed_ms, 2),
+            "max_ms": case.max_ms,
+        }
+        self.report.append(result)
+        return result
+
+    def test_every_url_has_a_budget(self):
+        # ARRANGE
+        url_names = {
+            pattern.name
+            for patterns in (urls.urlpatterns, async_urls.urlpatterns)
+            for pattern in patterns
+        }
+
+        # ACT
+        missing = url_names - set(BUDGETS)
+
+        # ASSERT
+        self.assertEqual(missing, set())
+
+    def test_endpoints_stay_within_budget(self):
+        for name, cases in BUDGETS.items():
+            for case in cases:
+                with self.subTest(name=name, method=case.method):
+                    # ACT
+                    result = self.measure(name, case)
+
+                    # ASSERT
+                    self.assertLess(result["status"], 400)
+                    self.assertLessEqual(result["queries"], case.max_queries)
+                    self.assertLessEqual(result["ms"], case.max_ms)
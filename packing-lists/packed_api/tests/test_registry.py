@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+import json
+from ..models import Category, Condition, Item
+from ..registry import ReferenceRegistry, bump_reference_version
+
+
+class ReferenceRegistryTests(TestCase):
+    def setUp(self):
+        # the rows below are never committed, so they do not bump the
+        # reference version, and registries loaded by other tests are dropped
+        cache.clear()
+        self.hot = Condition.objects.create(name="hot")
+        self.cold = Condition.objects.create(name="cold")
+        self.registry = ReferenceRegistry(Condition)
+
+    def test_rows_are_loaded_once(self):
+        # ARRANGE
+        self.registry.all()
+
+        # ACT
+        with CaptureQueriesContext(connection) as queries:
+            by_name = self.registry.get(name="hot")
+            by_id = self.registry.get(id=str(self.cold.id))
+            rows = self.registry.all()
+
+        # ASSERT
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(by_name, self.hot)
+        self.assertEqual(by_id, self.cold)
+        self.assertEqual(rows, [self.hot, self.cold])
+
+    def test_saving_a_row_reloads_the_registry(self):
+        # ARRANGE
+        self.registry.all()
+
+        # ACT
+        with self.captureOnCommitCallbacks(execute=True):
+            moderate = Condition.objects.create(name="moderate")
+
+        # ASSERT
+        self.assertEqual(self.registry.get(name="moderate"), moderate)
+
+    def test_queryset_update_and_version_bump_reloads_the_registry(self):
+        # ARRANGE
+        self.registry.all()
+
+        # ACT
+        with self.captureOnCommitCallbacks(execute=True):
+            Condition.objects.filter(id=self.hot.id).update(name="scorching")
+            bump_reference_version()
+
+        # ASSERT
+        self.assertEqual(self.registry.get(id=self.hot.id).name, "scorching")
+
+    def test_put_reloads_the_registry_once_it_commits(self):
+        # ARRANGE
+        self.registry.all()
+
+        # ACT
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.put(
+                f"/api/conditions/{self.hot.id}/",
+                json.dumps({"name": "scorching"}),
+                content_type="application/json",
+            )
+            before_commit = self.registry.get(id=self.hot.id).name
+
+        # ASSERT
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(before_commit, "hot")
+        # one bump of the reference version and one of the catalog version
+        self.assertEqual(len(callbacks), 2)
+        self.assertEqual(self.registry.get(id=self.hot.id).name, "scorching")
+
+    def test_saving_an_item_keeps_the_registry(self):
+        # ARRANGE
+        self.registry.all()
+        Item.objects.create(name="sunscreen", suggested=False, condition=self.hot)
+
+        # ACT
+        with CaptureQueriesContext(connection) as queries:
+            self.registry.get(name="hot")
+
+        # ASSERT
+        self.assertEqual(len(queries), 0)
+
+    def test_missing_rows_raise_does_not_exist(self):
+        # ACT / ASSERT
+        with self.assertRaises(Condition.DoesNotExist):
+            self.registry.get(name="humid")
+        with self.assertRaises(Condition.DoesNotExist):
+            self.registry.get(id="not a number")
+        with self.assertRaises(Category.DoesNotExist):
+            ReferenceRegistry(Category).get(name="user")
@@ -0,0 +1,65 @@
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from datetime import timedelta
+from io import StringIO
+from ..models import User
+from ..tokens import prune_expired_tokens, start_scheduled_pruning
+
+
+class PruneExpiredTokensTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="traveler", password="password")
+        now = timezone.now()
+        for index in range(5):
+            expired = OutstandingToken.objects.create(
+                user=cls.user,
+                jti=f"expired-{index}",
+                token="",
+                expires_at=now - timedelta(days=1),
+            )
+            BlacklistedToken.objects.create(token=expired)
+        OutstandingToken.objects.create(
+            user=cls.user, jti="expired", token="", expires_at=now - timedelta(days=1)
+        )
+        live = OutstandingToken.objects.create(
+            user=cls.user, jti="live", token="", expires_at=now + timedelta(days=1)
+        )
+        BlacklistedToken.objects.create(token=live)
+
+    def test_prune_deletes_only_expired_tokens(self):
+        # ACT
+        result = prune_expired_tokens(batch_size=2)
+
+        # ASSERT
+        self.assertEqual(result, (5, 6))
+        self.assertEqual(
+            list(OutstandingToken.objects.values_list("jti", flat=True)), ["live"]
+        )
+        self.assertEqual(BlacklistedToken.objects.get().token.jti, "live")
+
+    def test_prune_tokens_command(self):
+        # ARRANGE
+        stdout = StringIO()
+
+        # ACT
+        call_command("prune_tokens", batch_size=3, stdout=stdout)
+
+        # ASSERT
+        self.assertIn(
+            "Deleted 5 blacklisted and 6 outstanding tokens", stdout.getvalue()
+        )
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+
+    @override_settings(TOKEN_PRUNE_INTERVAL=0)
+    def test_scheduled_pruning_is_off_by_default(self):
+        # ACT
+        thread = start_scheduled_pruning()
+
+        # ASSERT
+        self.assertIsNone(thread)
@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PRUNING_LOCK_KEY = "tokens:pruning"
+
+_pruning_thread = None
+
+
+def delete_in_batches(queryset, batch_size):
+    """
+    Deletes the rows of a queryset 'batch_size' rows at a time, each batch
+    in its own transaction, so no lock is held for long however many rows
+    there are
+
+    Returns: the number of rows of the queryset's model that were deleted
+    """
+    label = queryset.model._meta.label
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by().values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            _, counts = queryset.model.objects.filter(id__in=ids).delete()
+        deleted += counts.get(label, 0)
+
+
+def prune_expired_tokens(batch_size=None, now=None):
+    """
+    Deletes the outstanding and blacklisted refresh tokens that have
+    expired. An expired refresh token is rejected before the blacklist is
+    consulted, so these rows are never read again.
+
+    Arguments:
+    - batch_size: how many rows to delete per query, TOKEN_PRUNE_BATCH_SIZE
+    by default
+    - now: the time tokens must have expired by
+
+    Returns: a tuple of the number of blacklisted and outstanding tokens
+    that were deleted
+    """
+    batch_size = batch_size or settings.TOKEN_PRUNE_BATCH_SIZE
+    now = now or timezone.now()
+    blacklisted = delete_in_batches(
+        BlacklistedToken.objects.filter(token__expires_at__lt=now), batch_size
+    )
+    outstanding = delete_in_batches(
+        OutstandingToken.objects.filter(expires_at__lt=now), batch_size
+    )
+    return blacklisted, outstanding
+
+
+def prune_tokens_forever(interval):
+    while True:
+        time.sleep(interval)
+        # with a shared CACHE_BACKEND only one server process prunes per
+        # interval, the others skip their turn
+        if not cache.add(PRUNING_LOCK_KEY, True, timeout=interval):
+            continue
+        try:
+            blacklisted, outstanding = prune_expired_tokens()
+            logger.info(
+                "Pruned %s blacklisted and %s outstanding tokens",
+                blacklisted,
+                outstanding,
+            )
+        except DatabaseError:
+            logger.exception("Pruning expired tokens failed")
+        finally:
+            connections.close_all()
+
+
+def start_scheduled_pruning():
+    """
+    Prunes expired tokens every TOKEN_PRUNE_INTERVAL seconds in a daemon
+    thread of this process, when it is above 0. Called by the WSGI and
+    ASGI entrypoints only, so management commands and tests never prune
+    in the background. Running 'manage.py prune_tokens' from cron is the
+    preferred way, this is for deployments without a scheduler
+
+    Returns: the thread, or None when scheduled pruning is turned off
+    """
+    global _pruning_thread
+    if settings.TOKEN_PRUNE_INTERVAL <= 0:
+        return None
+    if _pruning_thread is None:
+        _pruning_thread = threading.Thread(
+            target=prune_tokens_forever,
+            args=(settings.TOKEN_PRUNE_INTERVAL,),
+            name="prune-expired-tokens",
+            daemon=True,
+        )
+        _pruning_thread.start()
+    return _pruning_thread
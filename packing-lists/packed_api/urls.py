@@ -8,7 +8,10 @@ from .views import (
     api_category,
     api_item,
     api_packing_lists,
+    api_upcoming_packing_lists,
+    api_packing_lists_batch,
     api_packing_list_items,
+    api_packing_list_item,
     api_packing_list,
 )
 
@@ -25,10 +28,25 @@ urlpatterns = [
     path("conditions", api_conditions, name="api_conditions"),
     path("conditions/<int:pk>/", api_condition, name="api_condition"),
     path("packing_lists/", api_packing_lists, name="api_packing_lists"),
+    path(
+        "packing_lists/upcoming/",
+        api_upcoming_packing_lists,
+        name="api_upcoming_packing_lists",
+    ),
+    path(
+        "packing_lists/batch/",
+        api_packing_lists_batch,
+        name="api_packing_lists_batch",
+    ),
     path("packing_lists/<int:pk>/", api_packing_list, name="api_packing_list"),
     path(
         "packing_lists/<int:pk>/items/",
         api_packing_list_items,
         name="api_packing_list_items",
     ),
+    path(
+        "packing_list_items/<int:pk>/",
+        api_packing_list_item,
+        name="api_packing_list_item",
+    ),
 ]
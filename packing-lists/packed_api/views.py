@@ -1,25 +1,50 @@
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
 from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    Max,
+    Q,
+    Value,
+    When,
+    prefetch_related_objects,
+)
+from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 from rest_framework.decorators import (
     permission_classes,
     api_view,
 )
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from datetime import date, timedelta
+import hashlib
 import json
+from common.json import stream_json
+from common.pagination import InvalidPage, paginate
 from .encoders import (
     PackingListItemEncoder,
     PackingListEncoder,
+    PackingListWithItemsEncoder,
     CategoryEncoder,
     ConditionEncoder,
     ItemEncoder,
 )
+from .registry import (
+    categories,
+    conditions,
+)
+from .suggestions import get_catalog_suggestions
 from .models import (
     PackingListItem,
     PackingList,
     Category,
     Condition,
     Item,
+    batch_touches,
 )
 
 
@@ -30,6 +55,25 @@ def field_does_not_exist_error():
     )
 
 
+def update_instance(instance, content):
+    """
+    This is a helper function used by the PUT methods that changes the
+    given fields of a model instance and saves them, which sends the
+    post_save signal the caches and packing lists are invalidated from
+
+    Arguments:
+    - the model instance
+    - a dictionary of field names and their new values, a foreign key
+    is given as the id of the related row
+
+    Raises FieldDoesNotExist when a key is not a field of the model
+    """
+    fields = [instance._meta.get_field(name) for name in content]
+    for field in fields:
+        setattr(instance, field.attname, content[field.name])
+    instance.save(update_fields=[field.name for field in fields])
+
+
 def model_instance_does_not_exist_message(model_name, pk):
     return JsonResponse(
         {"message": f"'{model_name}' with id number of '{pk}' does not exist"},
@@ -44,6 +88,50 @@ def type_error_message(model_name):
     )
 
 
+def stream_response(key, queryset, encoder):
+    return StreamingHttpResponse(
+        stream_json(key, queryset, encoder, settings.STREAMING_CHUNK_SIZE),
+        content_type="application/json",
+    )
+
+
+def invalid_page_message(error):
+    return JsonResponse(
+        {"message": str(error)},
+        status=400,
+    )
+
+
+def conditional_get(request, build_response, *parts):
+    """
+    Answers a GET with a 304 when the client already holds the current
+    version of a response
+
+    Only the ETag decides freshness. No Last-Modified header is sent:
+    HTTP dates have a resolution of one second, two edits in the same
+    second or a deleted list would not move it, and a client sending
+    If-Modified-Since would be answered 304 with stale data.
+
+    Arguments:
+    - the request, read for its If-None-Match header and its query string
+    - a function without arguments that builds the full response, only
+    called when the client's copy is stale
+    - the values the response depends on, such as ids, counts and
+    update times, which the ETag is derived from
+
+    Returns: the response, carrying an ETag header
+    """
+    key = ":".join(str(part) for part in (*parts, request.GET.urlencode()))
+    etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = build_response()
+        if response.status_code == 200:
+            response["ETag"] = etag
+    patch_vary_headers(response, ["Authorization"])
+    return response
+
+
 # Category Views -------
 @api_view(["GET", "POST"])
 def api_categories(request):
@@ -52,15 +140,15 @@ def api_categories(request):
     needed to create a new catagory.
 
     Returns: (all json stringified)
-    GET: a dictionary with the key of 'categories' containing a queryset
-    of all Categories in the database
+    GET: a dictionary with the key of 'categories' containing a list
+    of all Categories in the database, served from the in-process
+    registry
 
     POST: a dictionary containing the newly created Category
     """
     if request.method == "GET":
-        categories = Category.objects.all().order_by("id")
         return JsonResponse(
-            {"categories": categories},
+            {"categories": categories.all()},
             encoder=CategoryEncoder,
         )
     else:
@@ -91,7 +179,7 @@ def api_category(request, pk):
     """
     if request.method == "GET":
         try:
-            category = Category.objects.get(id=pk)
+            category = categories.get(id=pk)
             return JsonResponse(
                 category,
                 encoder=CategoryEncoder,
@@ -102,10 +190,9 @@ def api_category(request, pk):
     elif request.method == "PUT":
         try:
             content = json.loads(request.body)
-            category = Category.objects.filter(id=pk)
-            category.update(**content)
+            update_instance(Category.objects.get(id=pk), content)
             return JsonResponse(
-                category,
+                Category.objects.filter(id=pk),
                 encoder=CategoryEncoder,
                 safe=False,
             )
@@ -122,26 +209,32 @@ def api_category(request, pk):
 
 
 # Item Views ------
-def get_user_items(user, included_items):
+def get_user_items(user, excluded_conditions):
     """
     This is a helper function used by 'api_conditional_items' that
-    removes duplicate suggested items from a list that will be offered
-    to the user
+    finds the items a user has packed before, leaving out the items
+    that are already suggested to them
+
+    The favorites are found with one query and ordered by how many
+    times the user has packed them. At most USER_FAVORITE_ITEMS_LIMIT
+    items are returned.
 
     Arguments:
-    - user: a User object
-    - included_items: a list of Item instances that will be checked
-    against for duplicates
+    - user: a User object or the ClaimsUser of the request
+    - excluded_conditions: a list of Condition instances or ids whose
+    items are already offered to the user
 
     Returns: a list of Item objects
     """
-    user_packing_list_items = PackingListItem.objects.filter(owner=user)
-    items = []
-    for packing_list_item in user_packing_list_items:
-        item = Item.objects.get(name=packing_list_item.item_name.name)
-        if item not in included_items and item not in items:
-            items.append(item)
-    return items
+    items = (
+        ItemEncoder.optimize_queryset(
+            Item.objects.filter(packing_lists__owner_id=user.id)
+        )
+        .exclude(condition__in=excluded_conditions)
+        .annotate(uses=Count("packing_lists"))
+        .order_by("-uses", "id")
+    )
+    return list(items[: settings.USER_FAVORITE_ITEMS_LIMIT])
 
 
 @require_http_methods(["GET", "POST"])
@@ -152,21 +245,33 @@ def api_items(request):
 
     Returns: (all json stringified)
     GET: a dictionary with the key of 'items' containing a list of all
-    Item rows in the database
+    Item rows in the database. With a '?limit=' and/or '?after=' cursor
+    parameter it holds one page of Items and a 'next' cursor instead.
+    With '?stream=true' every Item is streamed without loading them all
+    into memory. '?name=' only returns the Items with that name, ignoring
+    case
 
     POST: a dictionary with a newly created Item row
     """
     if request.method == "GET":
-        items = Item.objects.all()
-        return JsonResponse({"items": items}, encoder=ItemEncoder)
+        items = ItemEncoder.optimize_queryset(Item.objects.all())
+        if "name" in request.GET:
+            items = items.filter(name__iexact=request.GET["name"])
+        if request.GET.get("stream") == "true":
+            return stream_response("items", items, ItemEncoder)
+        try:
+            items, page = paginate(request, items)
+        except InvalidPage as error:
+            return invalid_page_message(error)
+        return JsonResponse({"items": items, **page}, encoder=ItemEncoder)
     else:
         content = json.loads(request.body)
         try:
             if "condition" in content:
-                condition = Condition.objects.get(name=content["condition"])
+                condition = conditions.get(name=content["condition"])
                 content["condition"] = condition
             if "category" in content:
-                category = Category.objects.get(name=content["category"])
+                category = categories.get(name=content["category"])
                 content["category"] = category
             item = Item.objects.create(**content)
             return JsonResponse(item, encoder=ItemEncoder, safe=False)
@@ -174,50 +279,90 @@ def api_items(request):
             return type_error_message("Item")
 
 
-@api_view(["GET"])
-@permission_classes([AllowAny])
-def api_conditional_items(request, condition):
+def parse_conditions(condition):
     """
-    This pivotal function receives a condition from the frontend and handles
-    the selection of appropriate items to be returned to the frontend
+    Arguments: a string containing one condition name or several
+    separated by commas, e.g. 'hot,moderate'
+
+    Returns: the sorted list of the distinct names, without 'any', whose
+    items are always suggested as the general items, and without 'user',
+    whose items users created themselves and are never suggested
+    """
+    names = {name.strip() for name in condition.split(",")}
+    return sorted(names - {"", "any", "user"})
+
+
+def conditional_items_response(request, user, condition):
+    """
+    This is a helper function that builds the GET response of
+    'api_conditional_items' and its async version
 
     Arguments:
-    - a string containing the name of an existing condition
+    - the request, read for its If-None-Match header
+    - the User whose favorites are added, or None for anonymous users
+    - a string containing the name of an existing condition, or several
+    separated by commas
 
-    Returns: a json stringified dictionary containing three key-value pairs:
-    conditional_items, general_items and user_favorite_items
+    Returns: the response
     """
-    if request.method == "GET":
-        try:
-            conditional_items = []
-            if condition != "any":
-                condition = Condition.objects.get(name=condition)
-                conditional_items = Item.objects.filter(condition=condition)
-            any_condition = Condition.objects.get(name="any")
-            general_items = Item.objects.filter(condition=any_condition)
-            if str(request.user) != "AnonymousUser":
-                user_favorite_items = get_user_items(
-                    request.user, list(conditional_items) + list(general_items)
-                )
-            else:
-                user_favorite_items = []
+    try:
+        condition_names = parse_conditions(condition)
+        version, catalog = get_catalog_suggestions(condition_names)
+        if user is not None:
+            user_favorite_items = get_user_items(user, catalog["condition_ids"])
+        else:
+            user_favorite_items = []
+        favorite_ids = ",".join(str(item.id) for item in user_favorite_items)
+        etag = quote_etag(
+            hashlib.md5(
+                f"{version}:{','.join(condition_names)}:{favorite_ids}".encode()
+            ).hexdigest()
+        )
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
             items = {
-                "conditional_items": conditional_items,
-                "general_items": general_items,
+                "conditional_items": catalog["conditional_items"],
+                "general_items": catalog["general_items"],
                 "user_favorite_items": user_favorite_items,
             }
-            return JsonResponse(
+            response = JsonResponse(
                 items,
                 encoder=ItemEncoder,
                 safe=False,
             )
-        except Condition.DoesNotExist:
-            return JsonResponse(
-                {
-                    "message": f"'{condition}' may be an invalid condition. Also, make sure you have 'any' condition in database"
-                },
-                status=400,
-            )
+            response["ETag"] = etag
+        patch_vary_headers(response, ["Authorization"])
+        return response
+    except Condition.DoesNotExist:
+        return JsonResponse(
+            {
+                "message": f"'{condition}' may be an invalid condition. Also, make sure you have 'any' condition in database"
+            },
+            status=400,
+        )
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def api_conditional_items(request, condition):
+    """
+    This pivotal function receives a condition from the frontend and handles
+    the selection of appropriate items to be returned to the frontend
+
+    Arguments:
+    - a string containing the name of an existing condition, or the names
+    of several separated by commas for a trip spanning several, e.g.
+    'hot,moderate', whose conditional items are combined
+
+    Returns: a json stringified dictionary containing three key-value pairs:
+    conditional_items, general_items and user_favorite_items. The conditional
+    and general items come from a cache, only the user's favorites are looked
+    up on every request. The response carries an ETag, and a request whose
+    If-None-Match header matches it receives a 304 instead.
+    """
+    if request.method == "GET":
+        user = request.user if request.user.is_authenticated else None
+        return conditional_items_response(request, user, condition)
 
 
 @require_http_methods(["GET", "PUT", "DELETE"])
@@ -249,15 +394,16 @@ def api_item(request, pk):
             return model_instance_does_not_exist_message("Item", pk)
     elif request.method == "DELETE":
         try:
-            count, _ = Item.objects.get(id=pk).delete()
+            with batch_touches():
+                count, _ = Item.objects.get(id=pk).delete()
             return JsonResponse({"message": count > 0})
         except Item.DoesNotExist:
             return model_instance_does_not_exist_message("Item", pk)
     else:
         try:
             content = json.loads(request.body)
-            Item.objects.filter(id=pk).update(**content)
             item = Item.objects.get(id=pk)
+            update_instance(item, content)
             return JsonResponse(item, encoder=ItemEncoder, safe=False)
         except Item.DoesNotExist:
             return model_instance_does_not_exist_message("Item", pk)
@@ -273,15 +419,15 @@ def api_conditions(request):
     needed to create a new condition.
 
     Returns: (all json stringified)
-    GET: a dictionary with the key of 'conditions' containing a queryset
-    of all Conditions in the database
+    GET: a dictionary with the key of 'all conditions' containing a list
+    of all Conditions in the database, served from the in-process
+    registry
 
     POST: a dictionary containing the newly created Condition
     """
     if request.method == "GET":
-        all_conditions = Condition.objects.all()
         return JsonResponse(
-            {"all conditions": all_conditions},
+            {"all conditions": conditions.all()},
             encoder=ConditionEncoder,
         )
     else:
@@ -316,7 +462,7 @@ def api_condition(request, pk):
     """
     if request.method == "GET":
         try:
-            condition = Condition.objects.get(id=pk)
+            condition = conditions.get(id=pk)
             return JsonResponse(
                 condition,
                 encoder=ConditionEncoder,
@@ -333,8 +479,8 @@ def api_condition(request, pk):
     else:
         try:
             content = json.loads(request.body)
-            Condition.objects.filter(id=pk).update(**content)
             condition = Condition.objects.get(id=pk)
+            update_instance(condition, content)
             return JsonResponse(condition, encoder=ConditionEncoder, safe=False)
         except Condition.DoesNotExist:
             return model_instance_does_not_exist_message("Condition", pk)
@@ -343,6 +489,55 @@ def api_condition(request, pk):
 
 
 # PackingList Views -----
+# the columns a PUT may change, the others are set by the server
+EDITABLE_PACKING_LIST_FIELDS = {
+    "title",
+    "departure_date",
+    "return_date",
+    "completed",
+    "destination_city",
+    "destination_country",
+    "origin_country",
+}
+
+
+def parse_trip_date(value):
+    """
+    This is a helper function used by 'create_packing_list' that turns
+    a trip date sent by the frontend into a date
+
+    Arguments: a string in the format 'YYYY-MM-DD', or an empty string
+    or None when the date is unknown
+
+    Returns: a date, or None when no date was given
+
+    Raises ValueError when the value is not a valid date
+    """
+    if not value:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"'{value}' is not a date")
+    return date.fromisoformat(value)
+
+
+def check_trip_dates(departure_date, return_date):
+    """
+    This is a helper function used by 'create_packing_list' and
+    'api_packing_list' PUT method that checks the dates of a trip
+
+    Arguments: the departure and return dates, either may be None
+
+    Raises ValueError when the trip returns before it departs, or lasts
+    longer than MAX_TRIP_DAYS, which 'api_upcoming_packing_lists' relies on
+    """
+    if departure_date is None or return_date is None:
+        return
+    if return_date < departure_date:
+        raise ValueError("'return_date' must not be before 'departure_date'")
+    if (return_date - departure_date).days > settings.MAX_TRIP_DAYS:
+        raise ValueError(f"A trip can last at most {settings.MAX_TRIP_DAYS} days")
+
+
 def create_packing_list(content):
     """
     This is a helper function for 'api_packing_lists' POST method that
@@ -351,72 +546,217 @@ def create_packing_list(content):
     Arguments: a dictionary containing the content the PackingList will
     be created with
 
-    Returns: the newly created PackingList model instance
+    Returns: the newly created PackingList model instance, or None when
+    a field is missing or the trip dates are not valid
 
     """
-    data = {
-        "title": content["title"],
-        "departure_date": content["departure_date"],
-        "return_date": content["return_date"],
-        "destination_city": content["destination_city"],
-        "destination_country": content["destination_country"],
-        "origin_country": content["origin_country"],
-        "owner": content["owner"],
-    }
     try:
-        packing_list = PackingList.objects.create(**data)
-        return packing_list
-    except KeyError:
+        data = {
+            "title": content["title"],
+            "departure_date": parse_trip_date(content["departure_date"]),
+            "return_date": parse_trip_date(content["return_date"]),
+            "destination_city": content["destination_city"],
+            "destination_country": content["destination_country"],
+            "origin_country": content["origin_country"],
+            "owner_id": content["owner"].id,
+        }
+        check_trip_dates(data["departure_date"], data["return_date"])
+    except (KeyError, ValueError):
         return None
+    packing_list = PackingList.objects.create(**data)
+    return packing_list
 
 
-def add_packing_list_item(item, packing_list, owner):
+def add_packing_list_items(items, packing_list, owner):
     """
     This is a helper function used by 'api_packing_list_items'
     PUT and POST methods
 
-    It first decides whether the Item passed in already is in the
-    database or not. If so, it finds that item and uses it to
-    create a new PackingListItme. If not, it creates an Item and
-    then creates a PackingListItem with that newly created Item.
+    It resolves every item name in one query. Names that are not in
+    the database yet become new user Items, and then all of the
+    PackingListItems are inserted together. Everything runs in one
+    transaction, so the number of queries does not grow with the
+    number of items.
 
     Arguments:
-    - a dictionary containing an Item instance
-    - a PackingList model instance the PackingListItem will soon
+    - a list of dictionaries each containing an Item instance
+    - a PackingList model instance the PackingListItems will soon
     belong to
-    - a User model instance the PackingListItem will soon belong
+    - the User (or ClaimsUser) the PackingListItems will soon belong
     to
 
     Returns:
-    an instance of a newly created PackingListItem
+    a list of the newly created PackingListItems in the same order
+    as the items passed in
     """
-    existing_item = Item.objects.filter(name=item["name"])
-    if item["suggested"] or len(existing_item) > 0:
-        linked_item = Item.objects.get(name=item["name"])
-        data = {
-            "item_name": linked_item,
-            "quantity": int(item["quantity"]),
-            "packing_list": packing_list,
-            "packed": item.get("packed", False),
-            "owner": owner,
-        }
-    else:
-        data = {
-            "name": item["name"],
-            "suggested": item["suggested"],
-            "category": Category.objects.get(name="user"),
-            "condition": Condition.objects.get(name="user"),
-        }
-        linked_item = Item.objects.create(**data)
-        data = {
-            "item_name": linked_item,
-            "quantity": int(item["quantity"]),
-            "packing_list": packing_list,
-            "packed": item.get("packed", False),
-            "owner": owner,
-        }
-    new_packing_list_item = PackingListItem.objects.create(**data)
-    return new_packing_list_item
+    with transaction.atomic():
+        linked_items = resolve_items(items)
+        packing_list_items = PackingListItem.objects.bulk_create(
+            [
+                PackingListItem(
+                    item_name=linked_items[item["name"]],
+                    quantity=int(item["quantity"]),
+                    packing_list=packing_list,
+                    packed=item.get("packed", False),
+                    owner_id=owner.id,
+                )
+                for item in items
+            ]
+        )
+        if packing_list_items:
+            packing_list.touch()
+    return packing_list_items
+
+
+def update_packing_list_items(items, packing_list, owner):
+    """
+    This is a helper function used by 'api_packing_list_items' PUT
+    method
+
+    It compares the items sent by the user against the stored
+    PackingListItems, matching them by id or by item name. Only the
+    rows that actually changed are written: new items are inserted,
+    changed quantities or packed states are updated and items that
+    are no longer on the list are deleted. The PackingList is touched
+    once, only when something changed.
+
+    Arguments:
+    - a list of dictionaries each containing an Item instance
+    - a PackingList model instance the PackingListItems belong to
+    - the User (or ClaimsUser) the PackingListItems belong to
+
+    Returns:
+    a list of all the PackingListItems of the packing list in the
+    same order as the items passed in
+    """
+    with transaction.atomic(), batch_touches():
+        stored_items = list(
+            PackingListItem.objects.filter(packing_list=packing_list)
+            .select_related("item_name")
+            .order_by("id")
+        )
+        unmatched = {row.id: row for row in stored_items}
+        rows_by_name = {}
+        for row in stored_items:
+            rows_by_name.setdefault(row.item_name.name, []).append(row)
+
+        matches = []
+        changed_rows = []
+        for item in items:
+            row = unmatched.get(item.get("id"))
+            if row is None or row.item_name.name != item["name"]:
+                row = next(
+                    (
+                        candidate
+                        for candidate in rows_by_name.get(item["name"], [])
+                        if candidate.id in unmatched
+                    ),
+                    None,
+                )
+            if row is not None:
+                del unmatched[row.id]
+                quantity = int(item["quantity"])
+                packed = item.get("packed", False)
+                if (row.quantity, row.packed, row.owner_id) != (
+                    quantity,
+                    packed,
+                    owner.id,
+                ):
+                    row.quantity, row.packed, row.owner_id = quantity, packed, owner.id
+                    changed_rows.append(row)
+            matches.append(row)
+
+        if changed_rows:
+            PackingListItem.objects.bulk_update(
+                changed_rows, ["quantity", "packed", "owner"]
+            )
+        if unmatched:
+            PackingListItem.objects.filter(id__in=unmatched).delete()
+        if changed_rows:
+            packing_list.touch()
+        new_items = [item for item, row in zip(items, matches) if row is None]
+        new_rows = iter(
+            add_packing_list_items(
+                items=new_items, packing_list=packing_list, owner=owner
+            )
+        )
+    return [row if row is not None else next(new_rows) for row in matches]
+
+
+def resolve_items(items):
+    """
+    This is a helper function used by 'add_packing_list_items' that
+    finds the Item for every item name, creating the missing ones as
+    user Items
+
+    Arguments: a list of dictionaries each containing an Item instance
+
+    Returns: a dictionary of Item model instances keyed by name
+    """
+    names = {item["name"] for item in items}
+    linked_items = {}
+    for existing_item in Item.objects.filter(name__in=names).order_by("id"):
+        linked_items.setdefault(existing_item.name, existing_item)
+    missing_names = [item["name"] for item in items if item["name"] not in linked_items]
+    if missing_names:
+        category = categories.get(name="user")
+        condition = conditions.get(name="user")
+        new_items = Item.objects.bulk_create(
+            [
+                Item(
+                    name=name,
+                    suggested=False,
+                    category=category,
+                    condition=condition,
+                )
+                for name in dict.fromkeys(missing_names)
+            ]
+        )
+        # user Items are never suggested, so the catalog stays valid
+        for new_item in new_items:
+            linked_items[new_item.name] = new_item
+    return linked_items
+
+
+def packing_lists_response(request, user):
+    """
+    This is a helper function that builds the GET response of
+    'api_packing_lists' and its async version
+
+    Arguments:
+    - the request, read for its query parameters and If-None-Match header
+    - the User whose PackingLists are listed
+
+    Returns: the response
+    """
+    packing_lists = PackingListEncoder.optimize_queryset(
+        PackingList.objects.filter(owner_id=user.id)
+    )
+
+    def build_response():
+        if request.GET.get("stream") == "true":
+            return stream_response(
+                "packing_lists", packing_lists.order_by("id"), PackingListEncoder
+            )
+        try:
+            rows, page = paginate(request, packing_lists, keys=("created", "id"))
+        except InvalidPage as error:
+            return invalid_page_message(error)
+        return JsonResponse(
+            {"packing_lists": rows, **page},
+            encoder=PackingListEncoder,
+        )
+
+    latest = PackingList.objects.filter(owner_id=user.id).aggregate(
+        updated_at=Max("updated_at"), count=Count("id")
+    )
+    return conditional_get(
+        request,
+        build_response,
+        user.id,
+        latest["count"],
+        latest["updated_at"],
+    )
 
 
 @api_view(["GET", "POST"])
@@ -431,17 +771,19 @@ def api_packing_lists(request):
     Returns: (all json stringified)
     GET: a dictionary containing a list of a user's PackingLists.
     These are formatted in a dictionary with the key of 'packing_lists'
-    and the value of a list of dictionaries.
+    and the value of a list of dictionaries. With a '?limit=' and/or
+    '?after=' cursor parameter it holds one page of PackingLists, oldest
+    first, and a 'next' cursor instead. With '?stream=true' all of the
+    user's PackingLists are streamed without loading them all into memory.
+    The ETag is derived from the number of lists and the latest update,
+    so a request whose If-None-Match header matches it receives a 304
+    without the lists being read.
 
     POST: a dictionary containing the newly created PackingList
     """
     user = request.user
     if request.method == "GET":
-        packing_lists = PackingList.objects.filter(owner=user)
-        return JsonResponse(
-            {"packing_lists": packing_lists},
-            encoder=PackingListEncoder,
-        )
+        return packing_lists_response(request, user)
     else:
         content = json.loads(request.body)
         content["owner"] = user
@@ -459,6 +801,148 @@ def api_packing_lists(request):
             )
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def api_upcoming_packing_lists(request):
+    """
+    Arguments:
+    - request.user contains the user info to help get the right lists
+
+    Returns: a json stringified dictionary with the key of 'packing_lists'
+    containing the user's PackingLists for trips that have not ended yet,
+    both upcoming and in progress, ordered by departure date. Trips longer
+    than MAX_TRIP_DAYS are not considered in progress, which keeps the
+    lookup a range scan of the (owner, departure_date) index. Accepts the
+    same '?limit=' and '?after=' parameters as 'api_packing_lists'.
+    """
+    today = date.today()
+    earliest_departure = today - timedelta(days=settings.MAX_TRIP_DAYS)
+    packing_lists = PackingListEncoder.optimize_queryset(
+        PackingList.objects.filter(
+            Q(departure_date__gte=today) | Q(return_date__gte=today),
+            owner_id=request.user.id,
+            departure_date__gte=earliest_departure,
+        ).order_by("departure_date", "id")
+    )
+    try:
+        packing_lists, page = paginate(
+            request, packing_lists, keys=("departure_date", "id")
+        )
+    except InvalidPage as error:
+        return invalid_page_message(error)
+    return JsonResponse(
+        {"packing_lists": packing_lists, **page},
+        encoder=PackingListEncoder,
+    )
+
+
+def parse_ids(value):
+    """
+    This is a helper function used by 'api_packing_lists_batch' that
+    reads a comma separated list of ids
+
+    Arguments: a string such as '1,2,3'
+
+    Returns: a list of the unique ids in the order they were given
+
+    Raises ValueError when an id is not an integer
+    """
+    ids = [int(id) for id in value.split(",") if id.strip()]
+    return list(dict.fromkeys(ids))
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def api_packing_lists_batch(request):
+    """
+    Arguments:
+    - '?ids=' a comma separated list of PackingList ids. Without it all
+    of the user's PackingLists are returned, a page at a time
+    - request.user contains the user info to help get the right lists
+
+    Returns: a json stringified dictionary with the key of 'packing_lists'
+    containing every requested PackingList with its items embedded, in
+    the order the ids were given. Lists that do not exist or belong to
+    another user are left out, ownership is checked by the same query
+    that loads the lists. The lists and all of their items are loaded
+    with a fixed number of queries.
+
+    At most PACKING_LIST_BATCH_MAX ids may be requested at once. Without
+    '?ids=' the response holds one page of at most PACKING_LIST_BATCH_MAX
+    lists and a 'next' cursor, and accepts the same '?limit=' and
+    '?after=' parameters as 'api_packing_lists'.
+    """
+    packing_lists = PackingListWithItemsEncoder.optimize_queryset(
+        PackingList.objects.filter(owner_id=request.user.id)
+    )
+    if "ids" not in request.GET:
+        try:
+            packing_lists, page = paginate(
+                request,
+                packing_lists,
+                keys=("created", "id"),
+                default_limit=settings.PACKING_LIST_BATCH_MAX,
+            )
+        except InvalidPage as error:
+            return invalid_page_message(error)
+        return JsonResponse(
+            {"packing_lists": packing_lists, **page},
+            encoder=PackingListWithItemsEncoder,
+        )
+    try:
+        ids = parse_ids(request.GET["ids"])
+    except ValueError:
+        return JsonResponse({"message": "Invalid ids"}, status=400)
+    if len(ids) > settings.PACKING_LIST_BATCH_MAX:
+        return JsonResponse(
+            {
+                "message": f"At most {settings.PACKING_LIST_BATCH_MAX} packing lists can be requested at once"
+            },
+            status=400,
+        )
+    order = {id: index for index, id in enumerate(ids)}
+    packing_lists = sorted(
+        packing_lists.filter(id__in=ids),
+        key=lambda packing_list: order[packing_list.id],
+    )
+    return JsonResponse(
+        {"packing_lists": packing_lists},
+        encoder=PackingListWithItemsEncoder,
+    )
+
+
+def packing_list_response(request, pk):
+    """
+    This is a helper function that builds the GET response of
+    'api_packing_list' and its async version
+
+    Arguments:
+    - the request, read for its query parameters and If-None-Match header
+    - an integer representing the ID of a packing list
+
+    Returns: the response
+    """
+    packing_list = PackingList.objects.get(id=pk)
+    encoder = PackingListEncoder
+    if request.GET.get("include") == "items":
+        encoder = PackingListWithItemsEncoder
+
+    def build_response():
+        prefetch_related_objects([packing_list], *encoder.prefetch_related)
+        return JsonResponse(
+            packing_list,
+            encoder=encoder,
+            safe=False,
+        )
+
+    return conditional_get(
+        request,
+        build_response,
+        packing_list.id,
+        packing_list.updated_at,
+    )
+
+
 @api_view(["GET", "PUT", "DELETE"])
 @permission_classes([IsAuthenticated])
 def api_packing_list(request, pk):
@@ -469,20 +953,23 @@ def api_packing_list(request, pk):
     data for one packing list in request.body
 
     Returns: (all json stringified)
-    GET: a dictionary containing the requested PackingList
-
-    PUT: a dictionary containing the updated PackingList
+    GET: a dictionary containing the requested PackingList. With
+    '?include=items' it also holds the list's PackingListItems under
+    'items', loaded with one prefetch query, so a list can be opened
+    with a single request. The response carries an ETag header, and a
+    request whose If-None-Match header matches it receives a 304
+    instead.
+
+    PUT: a dictionary containing the updated PackingList, or a 400 when
+    the body holds a field that is not in EDITABLE_PACKING_LIST_FIELDS, a
+    trip date is not valid, the trip returns before it departs or lasts
+    longer than MAX_TRIP_DAYS
 
     DELETE: a dictionary with the key of 'deleted' and the value
     of a boolean indicating whether the delete was successful or not
     """
     if request.method == "GET":
-        packing_list = PackingList.objects.get(id=pk)
-        return JsonResponse(
-            packing_list,
-            encoder=PackingListEncoder,
-            safe=False,
-        )
+        return packing_list_response(request, pk)
     elif request.method == "DELETE":
         try:
             count, _ = PackingList.objects.get(id=pk).delete()
@@ -494,7 +981,28 @@ def api_packing_list(request, pk):
     else:
         try:
             content = json.loads(request.body)
-            packing_list = PackingList.objects.update(**content)
+            fields = sorted(set(content) - EDITABLE_PACKING_LIST_FIELDS)
+            if fields:
+                return JsonResponse(
+                    {"message": f"Cannot update {', '.join(fields)}"},
+                    status=400,
+                )
+            dates = {
+                field: parse_trip_date(content[field])
+                for field in ["departure_date", "return_date"]
+                if field in content
+            }
+            if dates:
+                stored = PackingList.objects.values(
+                    "departure_date", "return_date"
+                ).get(id=pk)
+                stored.update(dates)
+                check_trip_dates(stored["departure_date"], stored["return_date"])
+                content.update(dates)
+            PackingList.objects.filter(id=pk).update(
+                **content, updated_at=timezone.now()
+            )
+            packing_list = PackingList.objects.get(id=pk)
             return JsonResponse(
                 packing_list,
                 encoder=PackingListEncoder,
@@ -502,11 +1010,189 @@ def api_packing_list(request, pk):
             )
         except PackingList.DoesNotExist:
             return model_instance_does_not_exist_message("PackingList", pk)
-        except FieldDoesNotExist:
-            return field_does_not_exist_error()
+        except ValueError as error:
+            return JsonResponse({"message": str(error)}, status=400)
+
+
+def invalid_json_message():
+    return JsonResponse(
+        {"message": "The request body is not valid JSON"},
+        status=400,
+    )
+
+
+def parse_item_changes(change):
+    """
+    This is a helper function used by the PackingListItem PATCH methods
+    that reads the columns a user wants to change
+
+    Arguments: a dictionary with a 'packed' boolean and/or a 'quantity'
+    integer. Any other key, such as 'id', is ignored
+
+    Returns: a dictionary of the columns to update and their new values
+
+    Raises ValueError, with a message meant for the client, when the
+    change is not a dictionary, neither column is given or a value is
+    not valid
+    """
+    if not isinstance(change, dict):
+        raise ValueError("Each change must be an object")
+    changes = {}
+    if "packed" in change:
+        if not isinstance(change["packed"], bool):
+            raise ValueError("'packed' must be a boolean")
+        changes["packed"] = change["packed"]
+    if "quantity" in change:
+        quantity = change["quantity"]
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 0:
+            raise ValueError("'quantity' must be a positive integer")
+        changes["quantity"] = quantity
+    if not changes:
+        raise ValueError("Nothing to change")
+    return changes
+
+
+def parse_changes_by_id(content):
+    """
+    This is a helper function used by 'api_packing_list_items' PATCH
+    method that reads the changes of several PackingListItems
 
+    Arguments: a dictionary with a list of changes under 'items', each
+    with the 'id' of a PackingListItem, see 'parse_item_changes'
 
-@api_view(["GET", "PUT", "POST"])
+    Returns: a dictionary of the changes keyed by PackingListItem id
+
+    Raises ValueError, with a message meant for the client, when the
+    list or one of its changes is not valid
+    """
+    if not isinstance(content, dict) or not isinstance(content.get("items"), list):
+        raise ValueError("'items' must be a list of changes")
+    changes_by_id = {}
+    for change in content["items"]:
+        changes = parse_item_changes(change)
+        item_id = change.get("id")
+        if isinstance(item_id, str) and item_id.isdigit():
+            item_id = int(item_id)
+        if isinstance(item_id, bool) or not isinstance(item_id, int):
+            raise ValueError("Each change needs the integer 'id' of an item")
+        changes_by_id[item_id] = changes
+    return changes_by_id
+
+
+def patch_packing_list_items(changes_by_id, owner, packing_list_id=None):
+    """
+    This is a helper function used by the PackingListItem PATCH methods
+    that applies partial updates to PackingListItems
+
+    Rows changing the same columns are updated together with one
+    UPDATE ... WHERE id IN query, whatever their new values, so ticking
+    many checkboxes or setting many quantities at once costs a single
+    query. A column whose value differs between rows is set with a
+    CASE id WHEN ... expression. Only rows on the owner's PackingLists
+    are touched, checked by the UPDATE itself.
+
+    Arguments:
+    - a dictionary of the changes made by 'parse_item_changes' keyed by
+    PackingListItem id
+    - the User (or ClaimsUser) the PackingLists must belong to
+    - packing_list_id: limits the update to the items of one PackingList
+
+    Returns: a list of the changed PackingListItems, ordered by id
+    """
+    rows = PackingListItem.objects.filter(packing_list__owner_id=owner.id)
+    if packing_list_id is not None:
+        rows = rows.filter(packing_list_id=packing_list_id)
+    rows = rows.filter(id__in=list(changes_by_id))
+    ids_by_columns = {}
+    for id, changes in changes_by_id.items():
+        ids_by_columns.setdefault(tuple(sorted(changes)), []).append(id)
+    with transaction.atomic():
+        updated = 0
+        for columns, ids in ids_by_columns.items():
+            values = {}
+            for column in columns:
+                new_values = {id: changes_by_id[id][column] for id in ids}
+                if len(set(new_values.values())) == 1:
+                    values[column] = new_values[ids[0]]
+                else:
+                    values[column] = Case(
+                        *[When(id=id, then=Value(v)) for id, v in new_values.items()],
+                        output_field=PackingListItem._meta.get_field(column),
+                    )
+            updated += rows.filter(id__in=ids).update(**values)
+        if not updated:
+            return []
+        PackingList.objects.filter(
+            id__in=rows.values("packing_list_id"), owner_id=owner.id
+        ).update(updated_at=timezone.now())
+    return list(PackingListItemEncoder.optimize_queryset(rows).order_by("id"))
+
+
+@api_view(["PATCH"])
+@permission_classes([IsAuthenticated])
+def api_packing_list_item(request, pk):
+    """
+    Arguments:
+    - an integer representing the ID of a PackingListItem
+    - request.body contains a json string with the new 'packed' and/or
+    'quantity' of the item
+
+    Returns: a json stringified dictionary containing the changed
+    PackingListItem. Only the given columns are written.
+    """
+    try:
+        content = json.loads(request.body)
+    except json.JSONDecodeError:
+        return invalid_json_message()
+    try:
+        changes = parse_item_changes(content)
+    except ValueError as error:
+        return JsonResponse({"message": str(error)}, status=400)
+    rows = patch_packing_list_items({pk: changes}, owner=request.user)
+    if not rows:
+        return model_instance_does_not_exist_message("PackingListItem", pk)
+    return JsonResponse(
+        rows[0],
+        encoder=PackingListItemEncoder,
+        safe=False,
+    )
+
+
+def packing_list_items_response(request, pk):
+    """
+    This is a helper function that builds the GET response of
+    'api_packing_list_items' and its async version
+
+    Arguments:
+    - the request, read for its query parameters and If-None-Match header
+    - an integer representing the ID of a packing list
+
+    Returns: the response
+    """
+    packing_list = PackingList.objects.only("id", "updated_at").get(id=pk)
+
+    def build_response():
+        items = PackingListItemEncoder.optimize_queryset(
+            PackingListItem.objects.filter(packing_list=packing_list)
+        )
+        try:
+            items, page = paginate(request, items)
+        except InvalidPage as error:
+            return invalid_page_message(error)
+        return JsonResponse(
+            {"items": items, **page},
+            encoder=PackingListItemEncoder,
+        )
+
+    return conditional_get(
+        request,
+        build_response,
+        packing_list.id,
+        packing_list.updated_at,
+    )
+
+
+@api_view(["GET", "PUT", "POST", "PATCH"])
 @permission_classes([IsAuthenticated])
 def api_packing_list_items(request, pk):
     """
@@ -517,37 +1203,35 @@ def api_packing_list_items(request, pk):
 
     Returns: (all json stringified)
     GET: an object with the key 'items' with a list of dictionaries representing
-    all the items in that packing list
+    all the items in that packing list. With a '?limit=' and/or '?after=' cursor
+    parameter it holds one page of items and a 'next' cursor instead. The
+    ETag is derived from the PackingList's update time, so a request whose
+    If-None-Match header matches it receives a 304 without the items being
+    read.
 
     PUT: an object with the key 'items' with a list of dictionaries representing
-    all the updated items in that packing list. Note: PackingListObjects are
-    ValueObjects and treated as immutable. They are deleted and recreated in this
-    mehtod.
+    all the updated items in that packing list. Only the PackingListItems that
+    were added, changed or removed are written to the database.
 
     POST: a dictionary with the key 'items' containing a list of dictionaries
     containing the newly created PackingListObjects
+
+    PATCH: request.body holds a list of changes under 'items', each with
+    the 'id' of a PackingListItem and its new 'packed' and/or 'quantity'.
+    Returns a dictionary with the key 'items' containing only the changed
+    PackingListItems. Items that are not on this list are left out.
     """
     owner = request.user
     if request.method == "GET":
-        packing_list = PackingList.objects.get(id=pk)
-        items = PackingListItem.objects.filter(packing_list=packing_list)
-        return JsonResponse(
-            {"items": items},
-            encoder=PackingListItemEncoder,
-        )
+        return packing_list_items_response(request, pk)
 
     elif request.method == "PUT":
         content = json.loads(request.body)
         packing_list = PackingList.objects.get(id=pk)
-        count, _ = PackingListItem.objects.filter(packing_list=packing_list).delete()
-        items = []
         try:
-            for item in content["items"]:
-                items.append(
-                    add_packing_list_item(
-                        item=item, packing_list=packing_list, owner=owner
-                    )
-                )
+            items = update_packing_list_items(
+                items=content["items"], packing_list=packing_list, owner=owner
+            )
             return JsonResponse(
                 {"items": items},
                 encoder=PackingListItemEncoder,
@@ -556,17 +1240,29 @@ def api_packing_list_items(request, pk):
         except TypeError:
             return type_error_message("Item")
 
+    elif request.method == "PATCH":
+        try:
+            content = json.loads(request.body)
+        except json.JSONDecodeError:
+            return invalid_json_message()
+        try:
+            changes_by_id = parse_changes_by_id(content)
+        except ValueError as error:
+            return JsonResponse({"message": str(error)}, status=400)
+        items = patch_packing_list_items(changes_by_id, owner=owner, packing_list_id=pk)
+        return JsonResponse(
+            {"items": items},
+            encoder=PackingListItemEncoder,
+            safe=False,
+        )
+
     else:
         content = json.loads(request.body)
         packing_list = PackingList.objects.get(id=pk)
-        items = []
         try:
-            for item in content["items"]:
-                items.append(
-                    add_packing_list_item(
-                        item=item, packing_list=packing_list, owner=owner
-                    )
-                )
+            items = add_packing_list_items(
+                items=content["items"], packing_list=packing_list, owner=owner
+            )
             return JsonResponse(
                 {"items": items},
                 encoder=PackingListItemEncoder,